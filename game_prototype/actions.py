@@ -1,7 +1,7 @@
 import random
 import copy
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from game_state import GameState, Zone, Player, AvatarName, BonusType, Modifiers
 from card_base import GuaCard, YaoCiTask
 from game_data import GAME_DECK, GENERIC_YAO_CI_POOL
@@ -21,6 +21,12 @@ from elegant_patterns import (
     validate_game_state, generate_possible_moves
 )
 
+# 每个区域可移动到的其他区域名，导入时预计算一次
+_OTHER_ZONES: Dict[Zone, Tuple[str, ...]] = {
+    current: tuple(zone.value for zone in Zone if zone != current)
+    for current in Zone
+}
+
 def check_zone_control(gs: GameState, zone_name: str): # This function mutates state, which is an exception to the pattern for now for simplicity.
     """Check and update zone control based on influence markers."""
     zone_data = gs.board.gua_zones[zone_name]
@@ -252,15 +258,14 @@ def get_valid_actions(game_state: GameState, player: Player, ap: int, mods: Modi
     
     # Move action
     if ap >= 1 and player.qi >= 1:  # Moving costs 1 AP and 1 Qi
-        for zone in Zone:
-            if zone != player.position:
-                actions[action_id] = {
-                    "action": move,
-                    "cost": 1,
-                    "description": f"Move to {zone.value}",
-                    "args": [zone.value]
-                }
-                action_id += 1
+        for zone_name in _OTHER_ZONES[player.position]:
+            actions[action_id] = {
+                "action": move,
+                "cost": 1,
+                "description": f"Move to {zone_name}",
+                "args": [zone_name]
+            }
+            action_id += 1
     
     # Enhanced study action (with Yijing wisdom)
     if ap >= 1:
@@ -6,16 +6,57 @@ Advanced Features System for TianJiBian Game
 """
 
 import json
+import logging
+import mmap
 import os
+import queue
+import sys
+import threading
 import time
 import hashlib
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, asdict
+import heapq
+import weakref
+from typing import Dict, List, Any, Optional, Tuple, Callable, Set
+from dataclasses import dataclass, fields
 from collections import defaultdict, deque
-import pickle
 import sqlite3
 
+from dataclass_utils import add_slots
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import lz4.frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 存档文件扩展名，按优先顺序排列（.lz4 内部为msgpack或JSON）
+SAVE_EXTENSIONS = ('.lz4', '.msgpack', '.json')
+
+# 存档中需要驻留（intern）的顶层字符串字段，以及玩家数据中的字符串列表字段
+_INTERNED_SAVE_FIELDS = ('player_name', 'save_name', 'game_version')
+_INTERNED_PLAYER_LISTS = ('cards', 'strategies_used')
+
+# LZ4帧格式的魔数
+LZ4_FRAME_MAGIC = b'\x04\x22\x4d\x18'
+
+# 存档索引文件名（记录 save_id -> [玩家名, 时间戳]，避免为读取元数据而解析全部存档）
+SAVE_INDEX_FILENAME = "saves.idx"
+
+@add_slots
 @dataclass
 class GameSave:
     """游戏存档数据类"""
@@ -29,7 +70,36 @@ class GameSave:
     playtime: float
     achievements: List[str]
     statistics: Dict[str, Any]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典（嵌套值本身已是普通dict/list，无需asdict的递归拷贝）"""
+        return _encode_game_save(self)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'GameSave':
+        """由字典构造存档"""
+        return _decode_game_save(data)
+
+def _compile_codec(cls) -> Tuple[Callable[[Any], Dict[str, Any]], Callable[[Dict[str, Any]], Any]]:
+    """根据数据类的字段生成专用的编码/解码函数
+    
+    字段列表在定义时已固定，生成的函数直接内联每个字段的存取，
+    省去运行时对数据类的反射和 **kwargs 解包。
+    """
+    names = [f.name for f in fields(cls)]
+    source = (
+        "def encode(obj):\n"
+        f"    return {{{', '.join(f'{name!r}: obj.{name}' for name in names)}}}\n"
+        "def decode(data):\n"
+        f"    return cls({', '.join(f'data[{name!r}]' for name in names)})\n"
+    )
+    namespace = {'cls': cls}
+    exec(source, namespace)
+    return namespace['encode'], namespace['decode']
+
+_encode_game_save, _decode_game_save = _compile_codec(GameSave)
 
+@add_slots
 @dataclass
 class PlayerStatistics:
     """玩家统计数据类"""
@@ -48,6 +118,7 @@ class PlayerStatistics:
     skill_level: str
     experience_points: int
 
+@add_slots
 @dataclass
 class Achievement:
     """成就数据类"""
@@ -61,27 +132,128 @@ class Achievement:
     unlocked: bool
     unlock_date: Optional[float]
 
+# 统计数据表字段（与PlayerStatistics字段顺序一致）
+STATS_COLUMNS = tuple(f.name for f in fields(PlayerStatistics))
+
+# 排行榜类别 -> 排序列（每列都建有降序索引）
+LEADERBOARD_COLUMNS = {
+    "win_rate": "win_rate",
+    "experience": "experience_points",
+    "playtime": "total_playtime",
+    "win_streak": "best_win_streak",
+}
+
+_STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    player_name TEXT PRIMARY KEY,
+    games_played INTEGER NOT NULL,
+    games_won INTEGER NOT NULL,
+    games_lost INTEGER NOT NULL,
+    total_playtime REAL NOT NULL,
+    favorite_strategy TEXT NOT NULL,
+    best_win_streak INTEGER NOT NULL,
+    current_win_streak INTEGER NOT NULL,
+    total_cards_played INTEGER NOT NULL,
+    total_hexagrams_used INTEGER NOT NULL,
+    achievements_unlocked TEXT NOT NULL,
+    last_played REAL NOT NULL,
+    skill_level TEXT NOT NULL,
+    experience_points INTEGER NOT NULL,
+    win_rate REAL GENERATED ALWAYS AS (
+        CASE WHEN games_played > 0 THEN CAST(games_won AS REAL) / games_played END
+    ) VIRTUAL
+);
+CREATE INDEX IF NOT EXISTS idx_players_win_rate ON players(win_rate DESC);
+CREATE INDEX IF NOT EXISTS idx_players_experience ON players(experience_points DESC);
+CREATE INDEX IF NOT EXISTS idx_players_playtime ON players(total_playtime DESC);
+CREATE INDEX IF NOT EXISTS idx_players_win_streak ON players(best_win_streak DESC);
+"""
+
+# 每局结算时会变化的列
+_RESULT_COLUMNS = (
+    'games_played', 'games_won', 'games_lost', 'total_playtime',
+    'best_win_streak', 'current_win_streak', 'total_cards_played',
+    'total_hexagrams_used', 'last_played', 'skill_level', 'experience_points',
+)
+
+_SELECT_STATS_SQL = f"SELECT {', '.join(STATS_COLUMNS)} FROM players"
+_UPSERT_STATS_SQL = (
+    f"INSERT OR REPLACE INTO players ({', '.join(STATS_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(STATS_COLUMNS))})"
+)
+_UPDATE_RESULT_SQL = (
+    f"UPDATE players SET {', '.join(f'{column} = ?' for column in _RESULT_COLUMNS)} "
+    f"WHERE player_name = ?"
+)
+
 class SaveGameManager:
     """游戏存档管理器"""
     
     def __init__(self, save_directory: str = "saves"):
         self.save_directory = save_directory
         self.max_saves = 50
+        # 存档数超出上限这么多个时才批量清理，避免每次保存都触发删除
+        self.cleanup_slack = 5
+        if LZ4_AVAILABLE:
+            self.save_extension = '.lz4'
+        else:
+            self.save_extension = '.msgpack' if MSGPACK_AVAILABLE else '.json'
+        # 查找存档时优先尝试当前格式
+        self._lookup_extensions = (self.save_extension,) + tuple(
+            extension for extension in SAVE_EXTENSIONS if extension != self.save_extension)
         self._ensure_save_directory()
+        self._index_file = os.path.join(self.save_directory, SAVE_INDEX_FILENAME)
+        self._index: Dict[str, Tuple[str, float]] = {}
+        self._load_index()
     
     def _ensure_save_directory(self):
         """确保存档目录存在"""
         if not os.path.exists(self.save_directory):
             os.makedirs(self.save_directory)
     
+    def _load_index(self):
+        """加载存档索引，索引缺失或损坏时从存档文件重建"""
+        try:
+            with open(self._index_file, 'r', encoding='utf-8') as f:
+                self._index = {save_id: (player_name, timestamp)
+                               for save_id, (player_name, timestamp) in json.load(f).items()}
+        except FileNotFoundError:
+            self._rebuild_index()
+        except (ValueError, TypeError) as e:
+            logger.warning("❌ 存档索引损坏，正在重建: %s", e)
+            self._rebuild_index()
+    
+    def _rebuild_index(self):
+        """扫描存档目录重建索引（仅在索引缺失时执行一次）"""
+        self._index = {}
+        with os.scandir(self.save_directory) as entries:
+            for entry in entries:
+                save_id, extension = os.path.splitext(entry.name)
+                if extension not in SAVE_EXTENSIONS or not entry.is_file():
+                    continue
+                try:
+                    save_data = self._read_save_file(entry.path)
+                    self._index[save_id] = (save_data['player_name'], save_data['timestamp'])
+                except Exception as e:
+                    logger.error("❌ 读取存档失败: %s (%s)", entry.name, e)
+        self._write_index()
+    
+    def _write_index(self):
+        """写入存档索引（先写临时文件再替换，写入中途崩溃不会损坏原索引）"""
+        temp_file = self._index_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, ensure_ascii=False)
+        os.replace(temp_file, self._index_file)
+    
     def save_game(self, game_state: Dict[str, Any], player_name: str, 
                   save_name: str = None, description: str = "") -> str:
         """保存游戏"""
-        timestamp = time.time()
-        save_id = hashlib.md5(f"{player_name}_{timestamp}".encode()).hexdigest()[:12]
+        timestamp_ns = time.time_ns()
+        timestamp = timestamp_ns / 1e9
+        save_id = hashlib.blake2b(f"{player_name}_{timestamp_ns}".encode(), digest_size=6).hexdigest()
         
         if not save_name:
-            save_name = f"存档_{datetime.fromtimestamp(timestamp).strftime('%Y%m%d_%H%M%S')}"
+            save_name = f"存档_{time.strftime('%Y%m%d_%H%M%S', time.localtime(timestamp))}"
         
         # 计算游戏时间
         playtime = game_state.get('playtime', 0)
@@ -104,14 +276,17 @@ class SaveGameManager:
         )
         
         # 保存到文件
-        save_file = os.path.join(self.save_directory, f"{save_id}.json")
-        with open(save_file, 'w', encoding='utf-8') as f:
-            json.dump(asdict(game_save), f, indent=2, ensure_ascii=False)
+        save_file = self._save_path(save_id, self.save_extension)
+        self._write_save_file(save_file, self._encode_save(game_save.to_dict()))
+        
+        self._index[save_id] = (player_name, timestamp)
+        self._write_index()
         
-        # 清理旧存档
-        self._cleanup_old_saves()
+        # 清理旧存档（超出上限一定数量后才批量清理，不在每次保存时执行）
+        if len(self._index) > self.max_saves + self.cleanup_slack:
+            self._cleanup_old_saves()
         
-        print(f"💾 游戏已保存: {save_name} (ID: {save_id})")
+        logger.info("💾 游戏已保存: %s (ID: %s)", save_name, save_id)
         return save_id
     
     def create_save(self, game_state: Dict[str, Any], player_name: str, 
@@ -119,99 +294,303 @@ class SaveGameManager:
         """创建新存档（save_game的别名方法）"""
         return self.save_game(game_state, player_name, save_name, description)
     
+    def _save_path(self, save_id: str, extension: str) -> str:
+        """存档文件路径"""
+        return os.path.join(self.save_directory, save_id + extension)
+    
+    def _encode_save(self, save_data: Dict[str, Any]) -> bytes:
+        """将存档编码为字节串（可用时使用LZ4压缩）"""
+        if MSGPACK_AVAILABLE:
+            payload = msgpack.packb(save_data, use_bin_type=True)
+        elif ORJSON_AVAILABLE:
+            payload = orjson.dumps(save_data, option=orjson.OPT_NON_STR_KEYS)
+        else:
+            payload = json.dumps(save_data, indent=2, ensure_ascii=False).encode('utf-8')
+        
+        if self.save_extension == '.lz4':
+            return lz4.frame.compress(payload)
+        return payload
+    
+    def _write_save_file(self, save_file: str, payload: bytes):
+        """一次性写入已编码的存档，绕过文本模式的文件包装"""
+        fd = os.open(save_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+        try:
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+    
+    def _decode_save(self, raw) -> Dict[str, Any]:
+        """解码存档数据（根据首字节区分LZ4、JSON与msgpack），raw可为bytes或mmap"""
+        if raw[:4] == LZ4_FRAME_MAGIC:
+            if not LZ4_AVAILABLE:
+                raise ValueError("存档为LZ4压缩格式，但未安装lz4")
+            raw = lz4.frame.decompress(raw)
+        if raw[:1] == b'{':
+            if ORJSON_AVAILABLE:
+                with memoryview(raw) as view:
+                    return orjson.loads(view)
+            return json.loads(bytes(raw))
+        if not MSGPACK_AVAILABLE:
+            raise ValueError("存档为msgpack格式，但未安装msgpack")
+        return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+    
+    @staticmethod
+    def _intern_save_strings(save_data: Dict[str, Any]):
+        """驻留存档中重复出现的短字符串（玩家名、卡牌名、策略名），减少批量加载时的内存分配"""
+        for key in _INTERNED_SAVE_FIELDS:
+            value = save_data.get(key)
+            if isinstance(value, str):
+                save_data[key] = sys.intern(value)
+        
+        game_state = save_data.get('game_state')
+        players = game_state.get('players') if isinstance(game_state, dict) else None
+        if not isinstance(players, dict):
+            return
+        
+        for name in list(players):
+            player_data = players.pop(name)
+            players[sys.intern(name)] = player_data
+            if not isinstance(player_data, dict):
+                continue
+            for key in _INTERNED_PLAYER_LISTS:
+                values = player_data.get(key)
+                if isinstance(values, list):
+                    player_data[key] = [sys.intern(v) if isinstance(v, str) else v for v in values]
+    
+    def _read_save_file(self, save_file: str) -> Dict[str, Any]:
+        """通过mmap读取并解码存档，省去缓冲读取的额外拷贝"""
+        fd = os.open(save_file, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                return self._decode_save(mm)
+        finally:
+            os.close(fd)
+    
     def load_game(self, save_id: str) -> Optional[GameSave]:
         """加载游戏"""
-        save_file = os.path.join(self.save_directory, f"{save_id}.json")
-        
-        if not os.path.exists(save_file):
-            print(f"❌ 存档不存在: {save_id}")
-            return None
-        
         try:
-            with open(save_file, 'r', encoding='utf-8') as f:
-                save_data = json.load(f)
+            for extension in self._lookup_extensions:
+                try:
+                    save_data = self._read_save_file(self._save_path(save_id, extension))
+                    break
+                except FileNotFoundError:
+                    continue
+            else:
+                logger.warning("❌ 存档不存在: %s", save_id)
+                return None
             
-            game_save = GameSave(**save_data)
-            print(f"📂 游戏已加载: {game_save.save_name}")
+            self._intern_save_strings(save_data)
+            game_save = GameSave.from_dict(save_data)
+            logger.info("📂 游戏已加载: %s", game_save.save_name)
             return game_save
         
         except Exception as e:
-            print(f"❌ 加载存档失败: {e}")
+            logger.error("❌ 加载存档失败: %s", e)
             return None
     
+    def _sorted_index(self, player_name: str = None) -> List[Tuple[str, float]]:
+        """按时间倒序返回索引中的 (save_id, 时间戳)"""
+        entries = [(save_id, timestamp) for save_id, (owner, timestamp) in self._index.items()
+                   if not player_name or owner == player_name]
+        entries.sort(key=lambda x: x[1], reverse=True)
+        return entries
+    
     def list_saves(self, player_name: str = None) -> List[GameSave]:
-        """列出存档"""
+        """列出存档（通过索引筛选，仅解析匹配的存档）"""
         saves = []
         
-        for filename in os.listdir(self.save_directory):
-            if filename.endswith('.json'):
-                save_id = filename[:-5]  # 移除.json后缀
-                game_save = self.load_game(save_id)
-                
-                if game_save and (not player_name or game_save.player_name == player_name):
-                    saves.append(game_save)
+        for save_id, _ in self._sorted_index(player_name):
+            game_save = self.load_game(save_id)
+            if game_save:
+                saves.append(game_save)
         
-        # 按时间排序
-        saves.sort(key=lambda x: x.timestamp, reverse=True)
         return saves
     
-    def delete_save(self, save_id: str) -> bool:
-        """删除存档"""
-        save_file = os.path.join(self.save_directory, f"{save_id}.json")
-        
-        if os.path.exists(save_file):
-            os.remove(save_file)
-            print(f"🗑️ 存档已删除: {save_id}")
+    def _remove_save_file(self, save_id: str) -> bool:
+        """删除存档文件并移除索引项（文件已不存在时也移除），返回是否删除了文件"""
+        self._index.pop(save_id, None)
+        for extension in self._lookup_extensions:
+            try:
+                os.remove(self._save_path(save_id, extension))
+            except FileNotFoundError:
+                continue
+            
+            logger.info("🗑️ 存档已删除: %s", save_id)
             return True
         
         return False
     
+    def delete_save(self, save_id: str) -> bool:
+        """删除存档"""
+        in_index = save_id in self._index
+        removed = self._remove_save_file(save_id)
+        if in_index:
+            self._write_index()
+        return removed
+    
     def _cleanup_old_saves(self):
-        """清理旧存档"""
-        saves = self.list_saves()
-        
-        if len(saves) > self.max_saves:
-            # 删除最旧的存档
-            for save in saves[self.max_saves:]:
-                self.delete_save(save.save_id)
+        """清理旧存档（仅依据索引选出最旧的存档，不解析存档内容）"""
+        excess = len(self._index) - self.max_saves
+        if excess <= 0:
+            return
+        
+        # 删除最旧的存档：只取最旧的excess个，无需对全部存档排序
+        oldest = heapq.nsmallest(excess, self._index.items(), key=lambda item: item[1][1])
+        for save_id, _ in oldest:
+            self._remove_save_file(save_id)
+        self._write_index()
+
+def _stats_writer_loop(stats_file: str, write_queue: "queue.Queue[Optional[Tuple[List[Any], Tuple]]]"):
+    """后台写入线程：取出队列中已积压的全部结果，在一个事务中写入，收到None时退出
+
+    不引用管理器本身，管理器不再使用时可以被回收
+    """
+    conn = sqlite3.connect(stats_file)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    try:
+        while True:
+            batch = [write_queue.get()]
+            while True:
+                try:
+                    batch.append(write_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            try:
+                with conn:
+                    # 仅更新结算相关的列，新玩家则插入整行
+                    for item in batch:
+                        if item is None:
+                            continue
+                        update_args, full_row = item
+                        if conn.execute(_UPDATE_RESULT_SQL, update_args).rowcount == 0:
+                            conn.execute(_UPSERT_STATS_SQL, full_row)
+            
+            except Exception as e:
+                logger.error("❌ 保存统计数据失败: %s", e)
+            
+            finally:
+                for _ in batch:
+                    write_queue.task_done()
+            
+            if None in batch:
+                return
+    finally:
+        conn.close()
+
+def _stop_stats_writer(write_queue: queue.Queue, writer: threading.Thread):
+    """写完积压结果后停止后台写入线程（可重复调用）"""
+    if writer.is_alive():
+        write_queue.put(None)
+        writer.join()
 
 class StatisticsManager:
-    """统计数据管理器"""
+    """统计数据管理器（SQLite存储，排行榜由索引直接排序）"""
     
-    def __init__(self, stats_file: str = "player_statistics.json"):
+    def __init__(self, stats_file: str = "player_statistics.db"):
         self.stats_file = stats_file
+        # 已访问玩家的内存视图，按需从数据库加载
         self.player_stats: Dict[str, PlayerStatistics] = {}
-        self.load_statistics()
+        # 排行榜缓存，任何统计写入后失效
+        self._leaderboard_cache: Dict[str, List[Tuple[str, Any]]] = {}
+        self._conn = sqlite3.connect(stats_file)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_STATS_SCHEMA)
+        self._migrate_legacy_json()
+        
+        # 对局结果由后台线程批量写入（write-behind），游戏循环无需等待磁盘
+        self._write_queue: "queue.Queue[Optional[Tuple[List[Any], Tuple]]]" = queue.Queue()
+        self._writer = threading.Thread(target=_stats_writer_loop, args=(stats_file, self._write_queue),
+                                        name="stats-writer", daemon=True)
+        self._writer.start()
+        # 管理器被回收或进程退出时停止写入线程；finalize只持有弱引用，不会让管理器常驻内存
+        self._stop_writer = weakref.finalize(self, _stop_stats_writer, self._write_queue, self._writer)
+    
+    @staticmethod
+    def _row_to_stats(row: Tuple) -> PlayerStatistics:
+        """数据库行 -> PlayerStatistics"""
+        stats = PlayerStatistics(*row)
+        stats.achievements_unlocked = json.loads(stats.achievements_unlocked)
+        return stats
+    
+    @staticmethod
+    def _stats_to_row(stats: PlayerStatistics) -> Tuple:
+        """PlayerStatistics -> 数据库行"""
+        row = [getattr(stats, column) for column in STATS_COLUMNS]
+        row[STATS_COLUMNS.index('achievements_unlocked')] = json.dumps(
+            stats.achievements_unlocked, ensure_ascii=False)
+        return tuple(row)
+    
+    def _migrate_legacy_json(self):
+        """将旧版JSON统计文件导入空数据库"""
+        legacy_file = os.path.splitext(self.stats_file)[0] + '.json'
+        if legacy_file == self.stats_file or not os.path.exists(legacy_file):
+            return
+        if self._conn.execute("SELECT 1 FROM players LIMIT 1").fetchone():
+            return
+        
+        try:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                stats_data = json.load(f)
+            legacy_stats = [PlayerStatistics(**data) for data in stats_data.values()]
+        except Exception as e:
+            logger.error("❌ 迁移旧版统计数据失败: %s", e)
+            return
+        
+        with self._conn:
+            self._conn.executemany(_UPSERT_STATS_SQL, map(self._stats_to_row, legacy_stats))
     
     def load_statistics(self):
-        """加载统计数据"""
-        if os.path.exists(self.stats_file):
-            try:
-                with open(self.stats_file, 'r', encoding='utf-8') as f:
-                    stats_data = json.load(f)
-                
-                for player_name, data in stats_data.items():
-                    self.player_stats[player_name] = PlayerStatistics(**data)
-            
-            except Exception as e:
-                print(f"❌ 加载统计数据失败: {e}")
+        """加载全部统计数据（初始化时不再调用，玩家数据按需加载）"""
+        try:
+            for row in self._conn.execute(_SELECT_STATS_SQL):
+                stats = self._row_to_stats(row)
+                self.player_stats[stats.player_name] = stats
+        
+        except Exception as e:
+            logger.error("❌ 加载统计数据失败: %s", e)
     
     def save_statistics(self):
-        """保存统计数据"""
+        """保存全部统计数据"""
+        self.flush()
+        self._leaderboard_cache.clear()
         try:
-            stats_data = {}
-            for player_name, stats in self.player_stats.items():
-                stats_data[player_name] = asdict(stats)
-            
-            with open(self.stats_file, 'w', encoding='utf-8') as f:
-                json.dump(stats_data, f, indent=2, ensure_ascii=False)
+            with self._conn:
+                self._conn.executemany(
+                    _UPSERT_STATS_SQL, map(self._stats_to_row, self.player_stats.values()))
         
         except Exception as e:
-            print(f"❌ 保存统计数据失败: {e}")
+            logger.error("❌ 保存统计数据失败: %s", e)
+    
+    def _save_game_result(self, stats: PlayerStatistics):
+        """将对局结果快照放入写入队列，立即返回"""
+        self._leaderboard_cache.clear()
+        update_args = [getattr(stats, column) for column in _RESULT_COLUMNS] + [stats.player_name]
+        self._write_queue.put((update_args, self._stats_to_row(stats)))
+    
+    def flush(self):
+        """等待写入队列中的对局结果全部落盘"""
+        self._write_queue.join()
+    
+    def close(self):
+        """写完积压结果，合并WAL日志并关闭数据库连接"""
+        self._stop_writer()
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._conn.close()
     
     def get_player_stats(self, player_name: str) -> PlayerStatistics:
-        """获取玩家统计数据"""
-        if player_name not in self.player_stats:
+        """获取玩家统计数据（首次访问时仅查询该玩家）"""
+        if player_name in self.player_stats:
+            return self.player_stats[player_name]
+        
+        row = self._conn.execute(
+            f"{_SELECT_STATS_SQL} WHERE player_name = ?", (player_name,)).fetchone()
+        if row is not None:
+            self.player_stats[player_name] = self._row_to_stats(row)
+        else:
             self.player_stats[player_name] = PlayerStatistics(
                 player_name=player_name,
                 games_played=0,
@@ -255,7 +634,7 @@ class StatisticsManager:
         # 更新技能等级
         self._update_skill_level(stats)
         
-        self.save_statistics()
+        self._save_game_result(stats)
     
     def _update_skill_level(self, stats: PlayerStatistics):
         """更新技能等级"""
@@ -273,42 +652,22 @@ class StatisticsManager:
             stats.skill_level = "新手"
     
     def get_leaderboard(self, category: str = "win_rate") -> List[Tuple[str, Any]]:
-        """获取排行榜"""
-        if not self.player_stats:
-            return []
-        
-        if category == "win_rate":
-            # 胜率排行榜
-            leaderboard = []
-            for name, stats in self.player_stats.items():
-                if stats.games_played > 0:
-                    win_rate = stats.games_won / stats.games_played
-                    leaderboard.append((name, win_rate))
+        """获取排行榜（前10名）"""
+        leaderboard = self._leaderboard_cache.get(category)
+        if leaderboard is None:
+            column = LEADERBOARD_COLUMNS.get(category)
+            if column is None:
+                return []
             
-            leaderboard.sort(key=lambda x: x[1], reverse=True)
-        
-        elif category == "experience":
-            # 经验排行榜
-            leaderboard = [(name, stats.experience_points) 
-                          for name, stats in self.player_stats.items()]
-            leaderboard.sort(key=lambda x: x[1], reverse=True)
-        
-        elif category == "playtime":
-            # 游戏时间排行榜
-            leaderboard = [(name, stats.total_playtime) 
-                          for name, stats in self.player_stats.items()]
-            leaderboard.sort(key=lambda x: x[1], reverse=True)
-        
-        elif category == "win_streak":
-            # 连胜排行榜
-            leaderboard = [(name, stats.best_win_streak) 
-                          for name, stats in self.player_stats.items()]
-            leaderboard.sort(key=lambda x: x[1], reverse=True)
-        
-        else:
-            return []
-        
-        return leaderboard[:10]  # 返回前10名
+            self.flush()
+            # 胜率仅统计有对局记录的玩家（无对局时win_rate为NULL）
+            leaderboard = self._conn.execute(
+                f"SELECT player_name, {column} FROM players "
+                f"WHERE {column} IS NOT NULL ORDER BY {column} DESC LIMIT 10"
+            ).fetchall()
+            self._leaderboard_cache[category] = leaderboard
+        
+        return list(leaderboard)
 
 class AchievementSystem:
     """成就系统"""
@@ -316,7 +675,15 @@ class AchievementSystem:
     def __init__(self, achievements_file: str = "achievements.json"):
         self.achievements_file = achievements_file
         self.achievements: Dict[str, Achievement] = {}
-        self.player_achievements: Dict[str, List[str]] = {}
+        self.player_achievements: Dict[str, Set[str]] = {}
+        # 解锁条件 -> 判定函数
+        self._condition_checkers: Dict[str, Callable[[Dict[str, Any]], bool]] = {
+            "win_first_game": lambda data: data.get('games_won', 0) >= 1,
+            "win_streak_5": lambda data: data.get('current_win_streak', 0) >= 5,
+            "use_all_strategies": lambda data: len(data.get('used_strategies', ())) >= 36,
+            "use_all_hexagrams": lambda data: len(data.get('used_hexagrams', ())) >= 64,
+            "fast_game": lambda data: data.get('last_game_duration', float('inf')) <= 300,  # 5分钟
+        }
         self._initialize_achievements()
         self.load_player_achievements()
     
@@ -389,40 +756,48 @@ class AchievementSystem:
         if os.path.exists(self.achievements_file):
             try:
                 with open(self.achievements_file, 'r', encoding='utf-8') as f:
-                    self.player_achievements = json.load(f)
+                    self.player_achievements = {name: set(ach_ids)
+                                                for name, ach_ids in json.load(f).items()}
             except Exception as e:
-                print(f"❌ 加载成就数据失败: {e}")
+                logger.error("❌ 加载成就数据失败: %s", e)
     
     def save_player_achievements(self):
         """保存玩家成就"""
         try:
             with open(self.achievements_file, 'w', encoding='utf-8') as f:
-                json.dump(self.player_achievements, f, indent=2, ensure_ascii=False)
+                json.dump({name: sorted(ach_ids) for name, ach_ids in self.player_achievements.items()},
+                          f, indent=2, ensure_ascii=False)
         except Exception as e:
-            print(f"❌ 保存成就数据失败: {e}")
+            logger.error("❌ 保存成就数据失败: %s", e)
     
     def check_achievements(self, player_name: str, game_data: Dict[str, Any]) -> List[Achievement]:
         """检查并解锁成就"""
         if player_name not in self.player_achievements:
-            self.player_achievements[player_name] = []
+            self.player_achievements[player_name] = set()
         
         unlocked_achievements = []
         player_unlocked = self.player_achievements[player_name]
         
+        # 已使用的策略/卦象去重一次，供条件判定直接取长度
+        game_data = dict(game_data)
+        for key in ('used_strategies', 'used_hexagrams'):
+            if key in game_data:
+                game_data[key] = set(game_data[key])
+        
+        # 只检查尚未解锁的成就（按定义顺序，解锁通知的顺序固定）
         for ach_id, achievement in self.achievements.items():
             if ach_id in player_unlocked:
-                continue  # 已解锁
-            
+                continue
             if self._check_unlock_condition(achievement.unlock_condition, game_data):
                 # 解锁成就
-                player_unlocked.append(ach_id)
+                player_unlocked.add(ach_id)
                 achievement.unlocked = True
                 achievement.unlock_date = time.time()
                 unlocked_achievements.append(achievement)
                 
-                print(f"🎉 成就解锁: {achievement.icon} {achievement.name}")
-                print(f"   {achievement.description}")
-                print(f"   奖励: {achievement.reward_points} 经验点")
+                logger.info("🎉 成就解锁: %s %s\n   %s\n   奖励: %d 经验点",
+                            achievement.icon, achievement.name,
+                            achievement.description, achievement.reward_points)
         
         if unlocked_achievements:
             self.save_player_achievements()
@@ -431,25 +806,8 @@ class AchievementSystem:
     
     def _check_unlock_condition(self, condition: str, game_data: Dict[str, Any]) -> bool:
         """检查解锁条件"""
-        if condition == "win_first_game":
-            return game_data.get('games_won', 0) >= 1
-        
-        elif condition == "win_streak_5":
-            return game_data.get('current_win_streak', 0) >= 5
-        
-        elif condition == "use_all_strategies":
-            used_strategies = game_data.get('used_strategies', set())
-            return len(used_strategies) >= 36
-        
-        elif condition == "use_all_hexagrams":
-            used_hexagrams = game_data.get('used_hexagrams', set())
-            return len(used_hexagrams) >= 64
-        
-        elif condition == "fast_game":
-            last_game_time = game_data.get('last_game_duration', float('inf'))
-            return last_game_time <= 300  # 5分钟
-        
-        return False
+        checker = self._condition_checkers.get(condition)
+        return checker is not None and checker(game_data)
     
     def get_player_achievements(self, player_name: str) -> List[Achievement]:
         """获取玩家成就"""
@@ -457,8 +815,8 @@ class AchievementSystem:
             return []
         
         unlocked_ids = self.player_achievements[player_name]
-        return [self.achievements[ach_id] for ach_id in unlocked_ids 
-                if ach_id in self.achievements]
+        return [achievement for ach_id, achievement in self.achievements.items()
+                if ach_id in unlocked_ids]
 
 class AdvancedFeaturesManager:
     """高级功能管理器"""
@@ -467,6 +825,10 @@ class AdvancedFeaturesManager:
         self.save_manager = SaveGameManager()
         self.stats_manager = StatisticsManager()
         self.achievement_system = AchievementSystem()
+    
+    def close(self):
+        """关闭统计数据库（写完积压结果并清理WAL文件）"""
+        self.stats_manager.close()
         
     def create_comprehensive_demo(self):
         """创建综合演示"""
@@ -513,7 +875,7 @@ class AdvancedFeaturesManager:
         if loaded_save:
             print(f"   存档名称: {loaded_save.save_name}")
             print(f"   游戏时间: {loaded_save.playtime:.1f}秒")
-            print(f"   保存时间: {datetime.fromtimestamp(loaded_save.timestamp).strftime('%Y-%m-%d %H:%M:%S')}")
+            print(f"   保存时间: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(loaded_save.timestamp))}")
         
         # 3. 统计数据演示
         print("\n📊 统计数据功能演示:")
@@ -579,17 +941,21 @@ class AdvancedFeaturesManager:
             print(f"   📁 {save.save_name}")
             print(f"      ID: {save.save_id}")
             print(f"      玩家: {save.player_name}")
-            print(f"      时间: {datetime.fromtimestamp(save.timestamp).strftime('%Y-%m-%d %H:%M:%S')}")
+            print(f"      时间: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(save.timestamp))}")
         
         print("\n" + "="*60)
         print("✅ 高级功能演示完成!")
         print("="*60)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print("🚀 天机变游戏高级功能系统")
     
     # 创建管理器实例
     advanced_features = AdvancedFeaturesManager()
     
     # 运行综合演示
-    advanced_features.create_comprehensive_demo()
\ No newline at end of file
+    try:
+        advanced_features.create_comprehensive_demo()
+    finally:
+        advanced_features.close()
\ No newline at end of file
@@ -7,44 +7,135 @@ Advanced Features Test - Save/Load, Statistics, Achievements, Leaderboards
 
 import sys
 import os
-import json
+import copy
 import time
+from contextlib import suppress
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Any, Optional, Tuple
 
 # 导入游戏模块
 from game_state import GameState, Player
 from multiplayer_manager import create_multiplayer_game
 from achievement_system import AchievementSystem
 from config_manager import ConfigManager
+from json_utils import encode_json, decode_json, encode_json_line, dump_json
+
+@lru_cache(maxsize=8)
+def _multiplayer_template(num_players: int, player_names: Tuple[str, ...]):
+    """缓存的多人游戏模板（同样的玩家配置只创建一次）"""
+    return create_multiplayer_game(num_players, list(player_names))
+
+def _create_test_game(num_players: int, player_names: List[str]):
+    """创建测试用多人游戏，返回缓存模板的深拷贝，各测试之间互不影响"""
+    return copy.deepcopy(_multiplayer_template(num_players, tuple(player_names)))
+
+# 存档需要的玩家字段（一次调用取出全部属性）
+_player_save_fields = attrgetter("name", "qi", "dao_xing", "position", "hand")
+
+# 模拟的成就解锁状态
+_MOCK_UNLOCKED = {
+    "first_win": True,
+    "card_master": False,
+    "qi_collector": True,
+    "dao_seeker": False
+}
+
+# 逐条追加的测试日志文件
+TEST_LOG_FILENAME = "advanced_features_test.jsonl"
+
+# 计为成功的测试结果
+_SUCCESS_RESULTS = frozenset(("成功", "完成", "存在"))
+
+# 功能评估：测试名关键字 -> 评估项
+_FEATURE_KEYWORDS = (
+    ("存档", "存档系统"),
+    ("统计", "统计系统"),
+    ("成就", "成就系统"),
+    ("排行榜", "排行榜系统"),
+    ("配置", "配置系统"),
+)
+
+@lru_cache(maxsize=None)
+def _classify_test(test_name: str) -> Tuple[str, Tuple[str, ...]]:
+    """测试名 -> (功能分类, 涉及的评估项)，结果按测试名缓存"""
+    feature, _, _ = test_name.partition("-")
+    systems = tuple(system for keyword, system in _FEATURE_KEYWORDS if keyword in test_name)
+    return feature, systems
 
 class AdvancedFeaturesTest:
     """高级功能测试"""
     
     def __init__(self):
-        self.test_results = []
+        # 测试记录按列存储（时间/测试/结果/详情），汇总时只需遍历用到的列
+        self._times: List[str] = []
+        self._test_names: List[str] = []
+        self._results: List[str] = []
+        self._details: List[str] = []
+        # 记录时即完成分类：功能分类与涉及的评估项
+        self._features: List[str] = []
+        self._feature_systems: List[Tuple[str, ...]] = []
+        # 每条记录即时写入JSONL，运行中断时已记录的结果不会丢失；日志文件在第一次记录时才打开
+        self._log_fh: Optional[BinaryIO] = None
+        self._log_mode = "wb"
         self.start_time = datetime.now()
+        # 同一秒内的日志复用已格式化的时间字符串
+        self._log_second = -1
+        self._log_time_str = ""
         
+    def _log_time(self) -> str:
+        """当前时间的 HH:MM:SS 字符串（每秒只格式化一次）"""
+        now = int(time.time())
+        if now != self._log_second:
+            self._log_second = now
+            self._log_time_str = time.strftime("%H:%M:%S", time.localtime(now))
+        return self._log_time_str
+    
     def log_test(self, test_name: str, result: str, details: str = ""):
         """记录测试结果"""
-        log_entry = {
-            "时间": datetime.now().strftime("%H:%M:%S"),
-            "测试": test_name,
-            "结果": result,
-            "详情": details
-        }
-        self.test_results.append(log_entry)
+        self._times.append(self._log_time())
+        self._test_names.append(test_name)
+        self._results.append(result)
+        self._details.append(details)
+        feature, systems = _classify_test(test_name)
+        self._features.append(feature)
+        self._feature_systems.append(systems)
+        if self._log_fh is None:
+            # 首次打开时清空旧日志，关闭后再记录则续写
+            self._log_fh = open(TEST_LOG_FILENAME, self._log_mode)
+            self._log_mode = "ab"
+        self._log_fh.write(encode_json_line(
+            {"时间": self._times[-1], "测试": test_name, "结果": result, "详情": details}
+        ))
+        self._log_fh.flush()
         print(f"🔧 {test_name}: {result}")
         if details:
             print(f"   详情: {details}")
     
+    def close(self):
+        """关闭测试日志文件"""
+        if self._log_fh is not None:
+            self._log_fh.close()
+            self._log_fh = None
+    
+    @property
+    def test_results(self) -> List[Dict[str, str]]:
+        """按行组装的测试日志（仅在输出报告时构建）"""
+        return [
+            {"时间": t, "测试": name, "结果": result, "详情": details}
+            for t, name, result, details in zip(self._times, self._test_names,
+                                                 self._results, self._details)
+        ]
+    
     def test_save_load_system(self):
         """测试存档系统"""
         print("\n💾 测试存档系统...")
         
         try:
             # 创建测试游戏状态
-            players, manager = create_multiplayer_game(2, ["测试玩家1", "测试玩家2"])
+            players, manager = _create_test_game(2, ["测试玩家1", "测试玩家2"])
             game_state = GameState(players=players)
             
             # 修改游戏状态
@@ -52,18 +143,14 @@ class AdvancedFeaturesTest:
             game_state.players[0].dao_xing = 15
             game_state.current_player_index = 1
             
-            # 测试保存
+            # 测试保存（在内存中序列化，只验证序列化往返，不经过磁盘）
             save_data = self._create_save_data(game_state)
-            save_file = "test_save.json"
+            payload = encode_json(save_data)
             
-            with open(save_file, "w", encoding="utf-8") as f:
-                json.dump(save_data, f, ensure_ascii=False, indent=2)
-            
-            self.log_test("游戏保存", "成功", f"保存到 {save_file}")
+            self.log_test("游戏保存", "成功", f"序列化 {len(payload)} 字节")
             
             # 测试加载
-            with open(save_file, "r", encoding="utf-8") as f:
-                loaded_data = json.load(f)
+            loaded_data = decode_json(payload)
             
             loaded_game_state = self._load_game_state(loaded_data)
             
@@ -75,10 +162,6 @@ class AdvancedFeaturesTest:
             else:
                 self.log_test("游戏加载", "失败", "数据完整性验证失败")
             
-            # 清理测试文件
-            if os.path.exists(save_file):
-                os.remove(save_file)
-            
             return True
             
         except Exception as e:
@@ -89,17 +172,17 @@ class AdvancedFeaturesTest:
         """创建存档数据"""
         return {
             "version": "1.0",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "current_player_index": game_state.current_player_index,
             "players": [
                 {
-                    "name": player.name,
-                    "qi": player.qi,
-                    "dao_xing": player.dao_xing,
-                    "position": player.position.value if hasattr(player.position, 'value') else str(player.position),
-                    "hand_size": len(player.hand)
+                    "name": name,
+                    "qi": qi,
+                    "dao_xing": dao_xing,
+                    "position": getattr(position, "value", None) or str(position),
+                    "hand_size": len(hand)
                 }
-                for player in game_state.players
+                for name, qi, dao_xing, position, hand in map(_player_save_fields, game_state.players)
             ]
         }
     
@@ -107,7 +190,7 @@ class AdvancedFeaturesTest:
         """从存档数据加载游戏状态"""
         # 创建玩家
         player_names = [p["name"] for p in save_data["players"]]
-        players, _ = create_multiplayer_game(len(player_names), player_names)
+        players, _ = _create_test_game(len(player_names), player_names)
         
         # 恢复玩家状态
         for i, player_data in enumerate(save_data["players"]):
@@ -139,8 +222,7 @@ class AdvancedFeaturesTest:
             
             # 保存统计数据
             stats_file = "player_statistics.json"
-            with open(stats_file, "w", encoding="utf-8") as f:
-                json.dump(stats, f, ensure_ascii=False, indent=2)
+            dump_json(stats, stats_file)
             
             self.log_test("统计数据保存", "成功", f"保存到 {stats_file}")
             
@@ -165,17 +247,22 @@ class AdvancedFeaturesTest:
     
     def _generate_statistics_report(self, stats: Dict) -> Dict:
         """生成统计报告"""
+        games_played = stats["games_played"]
+        games_won = stats["games_won"]
+        total_playtime = stats["total_playtime"]
+        hours, remainder = divmod(total_playtime, 3600)
+        
         return {
             "基础数据": {
-                "总游戏数": stats["games_played"],
-                "胜利次数": stats["games_won"],
+                "总游戏数": games_played,
+                "胜利次数": games_won,
                 "失败次数": stats["games_lost"],
-                "总游戏时间": f"{stats['total_playtime'] // 3600}小时{(stats['total_playtime'] % 3600) // 60}分钟"
+                "总游戏时间": f"{hours}小时{remainder // 60}分钟"
             },
             "游戏表现": {
-                "胜率": f"{(stats['games_won'] / stats['games_played']) * 100:.1f}%",
-                "平均游戏时长": f"{stats['total_playtime'] / stats['games_played']:.1f}秒",
-                "出牌效率": f"{stats['cards_played'] / stats['games_played']:.1f}张/局"
+                "胜率": f"{games_won * 100 / games_played:.1f}%",
+                "平均游戏时长": f"{total_playtime / games_played:.1f}秒",
+                "出牌效率": f"{stats['cards_played'] / games_played:.1f}张/局"
             },
             "成长数据": {
                 "累计获得气": stats["qi_gained"],
@@ -204,7 +291,7 @@ class AdvancedFeaturesTest:
                 
                 for achievement in test_achievements:
                     # 模拟成就检查
-                    unlocked = self._check_achievement(achievement["id"])
+                    unlocked = _MOCK_UNLOCKED.get(achievement["id"], False)
                     status = "已解锁" if unlocked else "未解锁"
                     self.log_test(f"成就-{achievement['name']}", status, achievement["description"])
                 
@@ -218,7 +305,7 @@ class AdvancedFeaturesTest:
                     "dao_seeker": {"unlocked": False, "progress": 32}
                 }
                 
-                unlocked_count = sum(1 for ach in achievements.values() if ach.get("unlocked", False))
+                unlocked_count = sum(ach.get("unlocked", False) for ach in achievements.values())
                 self.log_test("成就系统模拟", "成功", f"已解锁 {unlocked_count}/{len(achievements)} 个成就")
                 
                 return True
@@ -227,17 +314,6 @@ class AdvancedFeaturesTest:
             self.log_test("成就系统", "失败", f"错误: {e}")
             return False
     
-    def _check_achievement(self, achievement_id: str) -> bool:
-        """检查成就是否解锁"""
-        # 模拟成就检查逻辑
-        mock_unlocked = {
-            "first_win": True,
-            "card_master": False,
-            "qi_collector": True,
-            "dao_seeker": False
-        }
-        return mock_unlocked.get(achievement_id, False)
-    
     def test_leaderboard_system(self):
         """测试排行榜系统"""
         print("\n🥇 测试排行榜系统...")
@@ -253,12 +329,11 @@ class AdvancedFeaturesTest:
             ]
             
             # 按分数排序
-            leaderboard_data.sort(key=lambda x: x["score"], reverse=True)
+            leaderboard_data.sort(key=itemgetter("score"), reverse=True)
             
             # 保存排行榜
             leaderboard_file = "leaderboard.json"
-            with open(leaderboard_file, "w", encoding="utf-8") as f:
-                json.dump(leaderboard_data, f, ensure_ascii=False, indent=2)
+            dump_json(leaderboard_data, leaderboard_file)
             
             self.log_test("排行榜保存", "成功", f"包含{len(leaderboard_data)}名玩家")
             
@@ -268,8 +343,13 @@ class AdvancedFeaturesTest:
                 self.log_test(f"第{rank}名", "排名", f"{player['name']} - {player['score']}分")
             
             # 计算排行榜统计
-            avg_score = sum(p["score"] for p in leaderboard_data) / len(leaderboard_data)
-            avg_win_rate = sum(p["win_rate"] for p in leaderboard_data) / len(leaderboard_data)
+            total_score = 0
+            total_win_rate = 0.0
+            for p in leaderboard_data:
+                total_score += p["score"]
+                total_win_rate += p["win_rate"]
+            avg_score = total_score / len(leaderboard_data)
+            avg_win_rate = total_win_rate / len(leaderboard_data)
             
             self.log_test("排行榜统计", "完成", f"平均分数: {avg_score:.0f}, 平均胜率: {avg_win_rate:.1f}%")
             
@@ -323,13 +403,12 @@ class AdvancedFeaturesTest:
             }
             
             config_file = "test_config.json"
-            with open(config_file, "w", encoding="utf-8") as f:
-                json.dump(test_config, f, ensure_ascii=False, indent=2)
+            dump_json(test_config, config_file)
             
             self.log_test("配置保存", "成功", f"保存到 {config_file}")
             
             # 清理测试文件
-            if os.path.exists(config_file):
+            with suppress(FileNotFoundError):
                 os.remove(config_file)
             
             return True
@@ -352,34 +431,48 @@ class AdvancedFeaturesTest:
                 ("leaderboard.json", "排行榜")
             ]
             
+            # 按所在目录分组，每个目录只扫描一次
+            dir_entries: Dict[str, Dict[str, os.DirEntry]] = {}
             existing_files = 0
             for file_path, description in data_files:
-                if os.path.exists(file_path):
+                parent, name = os.path.split(file_path.rstrip("/"))
+                parent = parent or "."
+                entries = dir_entries.get(parent)
+                if entries is None:
+                    try:
+                        with os.scandir(parent) as it:
+                            entries = {entry.name: entry for entry in it}
+                    except OSError:
+                        entries = {}
+                    dir_entries[parent] = entries
+                entry = entries.get(name)
+                # 以"/"结尾的路径要求是目录
+                if entry is not None and (not file_path.endswith("/") or entry.is_dir()):
                     self.log_test(f"数据文件-{description}", "存在", file_path)
                     existing_files += 1
                 else:
                     self.log_test(f"数据文件-{description}", "不存在", file_path)
             
             # 测试数据目录创建
-            test_dir = "test_data"
-            if not os.path.exists(test_dir):
-                os.makedirs(test_dir)
-                self.log_test("目录创建", "成功", test_dir)
+            test_dir = Path("test_data")
+            # 直接创建，已存在时由FileExistsError告知，省去单独的存在性检查
+            with suppress(FileExistsError):
+                test_dir.mkdir(parents=True)
+                self.log_test("目录创建", "成功", str(test_dir))
             
             # 测试文件写入权限
-            test_file = os.path.join(test_dir, "test.json")
-            test_data = {"test": True, "timestamp": datetime.now().isoformat()}
+            test_file = str(test_dir / "test.json")
+            test_data = {"test": True, "timestamp": datetime.now()}
             
-            with open(test_file, "w", encoding="utf-8") as f:
-                json.dump(test_data, f)
+            dump_json(test_data, test_file)
             
             self.log_test("文件写入", "成功", test_file)
             
             # 清理测试文件
-            if os.path.exists(test_file):
+            with suppress(FileNotFoundError):
                 os.remove(test_file)
-            if os.path.exists(test_dir):
-                os.rmdir(test_dir)
+            with suppress(FileNotFoundError):
+                test_dir.rmdir()
             
             self.log_test("数据持久化", "评估", f"发现 {existing_files}/{len(data_files)} 个数据文件")
             
@@ -397,19 +490,22 @@ class AdvancedFeaturesTest:
         duration = (end_time - self.start_time).total_seconds()
         
         # 统计测试结果
-        total_tests = len(self.test_results)
-        successful_tests = len([test for test in self.test_results if test["结果"] in ["成功", "完成", "存在"]])
+        total_tests = len(self._results)
+        successful_tests = sum(result in _SUCCESS_RESULTS for result in self._results)
         success_rate = (successful_tests / total_tests * 100) if total_tests > 0 else 0
         
-        # 按功能分类统计
-        feature_stats = {}
-        for test in self.test_results:
-            feature = test["测试"].split("-")[0] if "-" in test["测试"] else test["测试"]
-            if feature not in feature_stats:
-                feature_stats[feature] = {"total": 0, "success": 0}
-            feature_stats[feature]["total"] += 1
-            if test["结果"] in ["成功", "完成", "存在"]:
-                feature_stats[feature]["success"] += 1
+        # 按功能分类统计 [成功数, 总数]，同一遍扫描中记录已实现的功能
+        feature_stats: Dict[str, List[int]] = {}
+        implemented = set()
+        for feature, systems, result in zip(self._features, self._feature_systems, self._results):
+            stats = feature_stats.get(feature)
+            if stats is None:
+                stats = feature_stats[feature] = [0, 0]
+            stats[1] += 1
+            if result in _SUCCESS_RESULTS:
+                stats[0] += 1
+            if result == "成功":
+                implemented.update(systems)
         
         report = {
             "测试时间": self.start_time.strftime("%Y-%m-%d %H:%M:%S"),
@@ -418,26 +514,18 @@ class AdvancedFeaturesTest:
             "成功测试数": successful_tests,
             "成功率": f"{success_rate:.1f}%",
             "功能统计": {
-                feature: {
-                    "成功率": f"{(stats['success'] / stats['total'] * 100):.1f}%",
-                    "成功数": stats["success"],
-                    "总数": stats["total"]
-                }
-                for feature, stats in feature_stats.items()
+                feature: {"成功率": f"{success * 100 / total:.1f}%", "成功数": success, "总数": total}
+                for feature, (success, total) in feature_stats.items()
             },
             "详细测试日志": self.test_results,
             "功能评估": {
-                "存档系统": "已实现" if any("存档" in test["测试"] and test["结果"] == "成功" for test in self.test_results) else "需实现",
-                "统计系统": "已实现" if any("统计" in test["测试"] and test["结果"] == "成功" for test in self.test_results) else "需实现",
-                "成就系统": "已实现" if any("成就" in test["测试"] and test["结果"] == "成功" for test in self.test_results) else "需实现",
-                "排行榜系统": "已实现" if any("排行榜" in test["测试"] and test["结果"] == "成功" for test in self.test_results) else "需实现",
-                "配置系统": "已实现" if any("配置" in test["测试"] and test["结果"] == "成功" for test in self.test_results) else "需实现"
+                system: "已实现" if system in implemented else "需实现"
+                for _, system in _FEATURE_KEYWORDS
             }
         }
         
         # 保存报告
-        with open("advanced_features_test_report.json", "w", encoding="utf-8") as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
+        dump_json(report, "advanced_features_test_report.json")
         
         print(f"📋 高级功能测试报告已保存: advanced_features_test_report.json")
         print(f"⭐ 总体评分: {success_rate:.1f}%")
@@ -450,26 +538,29 @@ class AdvancedFeaturesTest:
         print("🔧 天机变游戏 - 高级功能测试")
         print("=" * 60)
         
-        # 1. 存档系统测试
-        self.test_save_load_system()
-        
-        # 2. 统计系统测试
-        self.test_statistics_system()
-        
-        # 3. 成就系统测试
-        self.test_achievement_system()
-        
-        # 4. 排行榜系统测试
-        self.test_leaderboard_system()
-        
-        # 5. 配置系统测试
-        self.test_config_system()
-        
-        # 6. 数据持久化测试
-        self.test_data_persistence()
-        
-        # 7. 生成报告
-        report = self.generate_advanced_features_report()
+        try:
+            # 1. 存档系统测试
+            self.test_save_load_system()
+            
+            # 2. 统计系统测试
+            self.test_statistics_system()
+            
+            # 3. 成就系统测试
+            self.test_achievement_system()
+            
+            # 4. 排行榜系统测试
+            self.test_leaderboard_system()
+            
+            # 5. 配置系统测试
+            self.test_config_system()
+            
+            # 6. 数据持久化测试
+            self.test_data_persistence()
+            
+            # 7. 生成报告
+            report = self.generate_advanced_features_report()
+        finally:
+            self.close()
         
         print("\n" + "=" * 60)
         print("🎉 高级功能测试完成!")
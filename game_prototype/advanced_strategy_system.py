@@ -5,12 +5,16 @@
 实现变卦、互卦、错卦等易经智慧在游戏中的应用
 """
 
-from typing import Dict, List, Tuple, Optional, Set
-from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Tuple, Optional, Set
+from collections import deque
+from dataclasses import dataclass, field, fields
 from enum import Enum
 import random
+import sys
 import time
+import weakref
 
+from dataclass_utils import add_slots
 from game_state import GameState, Player
 from enhanced_hexagram_system import (
     enhanced_hexagram_system, HexagramRelationType, 
@@ -21,411 +25,572 @@ from generate_64_guas import GUA_64_INFO
 from ui_enhancement import enhanced_print, enhanced_input, ui_enhancement
 
 class StrategyType(Enum):
-    """策略类型"""
-    TRANSFORMATION = "变卦策略"    # 变卦相关策略
-    SYNERGY = "协同策略"          # 卦象协同策略
-    BALANCE = "平衡策略"          # 阴阳五行平衡策略
-    TIMING = "时机策略"           # 时机把握策略
-    ADAPTATION = "适应策略"       # 适应变化策略
+    """策略类型（值经sys.intern驻留，比较与哈希走指针快速路径）"""
+    TRANSFORMATION = sys.intern("变卦策略")    # 变卦相关策略
+    SYNERGY = sys.intern("协同策略")          # 卦象协同策略
+    BALANCE = sys.intern("平衡策略")          # 阴阳五行平衡策略
+    TIMING = sys.intern("时机策略")           # 时机把握策略
+    ADAPTATION = sys.intern("适应策略")       # 适应变化策略
 
+# 每位玩家保留的变卦历史条数
+TRANSFORMATION_HISTORY_LIMIT = 64
+
+@add_slots
 @dataclass
+class PlayerStrategy:
+    """玩家策略状态"""
+    last_strategy_turn: Optional[int] = None  # 最近一次使用策略行动的回合
+    strategy_cooldowns: Dict[str, int] = field(default_factory=dict)  # 行动ID -> 可再次使用的回合
+    hexagram_mastery: Dict[str, int] = field(default_factory=dict)  # 卦象掌握度
+    transformation_history: Deque[Tuple[str, str]] = field(
+        default_factory=lambda: deque(maxlen=TRANSFORMATION_HISTORY_LIMIT))  # 最近的变卦历史
+    transformation_count: int = 0  # 累计变卦次数
+    synergy_bonus: float = 1.0
+
+# 五行、八卦各占一位，各卦的五行/八卦组成在启动时预先编码为位掩码
+_ELEMENT_BIT: Dict[WuXing, int] = {
+    element: 1 << i
+    for i, element in enumerate(dict.fromkeys(info["element"] for info in GUA_64_INFO.values()))
+}
+_TRIGRAM_BIT: Dict[str, int] = {
+    trigram: 1 << i
+    for i, trigram in enumerate(dict.fromkeys(
+        trigram for info in GUA_64_INFO.values() for trigram in info["trigrams"]))
+}
+# 卦名 -> (五行掩码, 八卦掩码)，扫描时每个区域只需一次查找
+_ZONE_MASKS: Dict[str, Tuple[int, int]] = {
+    name: (_ELEMENT_BIT[info["element"]],
+           sum(_TRIGRAM_BIT[trigram] for trigram in set(info["trigrams"])))
+    for name, info in GUA_64_INFO.items()
+}
+
+def _popcount(mask: int) -> int:
+    """统计置位数（Python 3.9 没有 int.bit_count）"""
+    return bin(mask).count("1")
+
+@dataclass
+class ControlledZones:
+    """玩家控制的卦象区域及其五行、八卦汇总（一次扫描得出）"""
+    zones: List[str] = field(default_factory=list)
+    element_mask: int = 0   # 涉及的五行（按位）
+    trigram_mask: int = 0   # 涉及的八卦（按位）
+    
+    @property
+    def element_count(self) -> int:
+        """不同五行数"""
+        return _popcount(self.element_mask)
+    
+    @property
+    def trigram_count(self) -> int:
+        """不同八卦数"""
+        return _popcount(self.trigram_mask)
+
+def _scan_controlled_zones(player_name: str, gua_zones: Dict[str, Dict]) -> ControlledZones:
+    """扫描棋盘，汇总玩家控制的区域
+    
+    AI推演会对每个候选局面调用，循环内只做局部变量运算，掩码在结束时一次写入。
+    """
+    zones = [zone_name for zone_name, zone_data in gua_zones.items()
+             if zone_data.get("controller") == player_name]
+    zone_masks = _ZONE_MASKS
+    element_mask = 0
+    trigram_mask = 0
+    for zone_name in zones:
+        masks = zone_masks.get(zone_name)
+        if masks is not None:
+            element_mask |= masks[0]
+            trigram_mask |= masks[1]
+    return ControlledZones(zones, element_mask, trigram_mask)
+
+@add_slots
+@dataclass(frozen=True)
+class Cost:
+    """策略消耗资源"""
+    qi: int = 0
+    dao_xing: int = 0
+    cheng_yi: int = 0
+    
+    def format(self) -> str:
+        """格式化为 "qi:3, dao_xing:1"（省略为0的资源）"""
+        return ", ".join(f"{f.name}:{getattr(self, f.name)}" for f in fields(self)
+                         if getattr(self, f.name))
+
+# 条件检查函数: (玩家, 游戏状态, 玩家策略状态, 控制区域汇总) -> 是否满足
+ConditionCheck = Callable[[Player, GameState, PlayerStrategy, ControlledZones], bool]
+
+def _controls_any_hexagram(player: Player, game_state: GameState,
+                           player_strategy: PlayerStrategy, controlled: ControlledZones) -> bool:
+    """检查玩家是否控制任何卦象区域"""
+    return bool(controlled.zones)
+
+def _has_diverse_elements(player: Player, game_state: GameState,
+                          player_strategy: PlayerStrategy, controlled: ControlledZones) -> bool:
+    """检查五行多样性"""
+    return controlled.element_count >= 3
+
+def _is_yin_yang_balanced(player: Player, game_state: GameState,
+                          player_strategy: PlayerStrategy, controlled: ControlledZones) -> bool:
+    """检查阴阳平衡度"""
+    return abs(player.yin_yang_balance - 0.5) <= 0.1
+
+def _has_trigram_mastery(player: Player, game_state: GameState,
+                         player_strategy: PlayerStrategy, controlled: ControlledZones) -> bool:
+    """检查八卦掌握度"""
+    return controlled.trigram_count >= 4
+
+def _no_recent_strategy(player: Player, game_state: GameState,
+                        player_strategy: PlayerStrategy, controlled: ControlledZones) -> bool:
+    """检查策略使用历史：最近3回合内未使用过策略行动"""
+    last_turn = player_strategy.last_strategy_turn
+    return last_turn is None or game_state.turn - last_turn >= 3
+
+def _condition_always_met(player: Player, game_state: GameState,
+                          player_strategy: PlayerStrategy, controlled: ControlledZones) -> bool:
+    """尚未实现检查的条件（资源条件已由消耗检查覆盖）"""
+    return True
+
+# 条件描述 -> 检查函数；策略行动创建时即编译为函数列表
+_CONDITION_REGISTRY: Dict[str, ConditionCheck] = {
+    sys.intern(label): check for label, check in {
+        "拥有至少一个卦象": _controls_any_hexagram,
+        "拥有不同五行属性的卦象≥3": _has_diverse_elements,
+        "阴阳平衡度≥0.4": _is_yin_yang_balanced,
+        "掌握不同八卦≥4": _has_trigram_mastery,
+        "连续3回合未使用策略行动": _no_recent_strategy,
+        # 添加更多条件检查...
+    }.items()
+}
+
+@add_slots
+@dataclass(frozen=True)
 class StrategyAction:
-    """策略行动"""
+    """策略行动（不可变，可作为字典键或集合元素）"""
     name: str
     description: str
     strategy_type: StrategyType
-    cost: Dict[str, int]  # 消耗资源
-    effects: Dict[str, any]  # 效果
-    conditions: List[str]  # 激活条件
+    cost: Cost  # 消耗资源
+    effects: Tuple[Tuple[str, Any], ...] = field(compare=False)  # 效果（名称, 数值）对，可传入字典
+    conditions: Tuple[str, ...]  # 激活条件（描述文字）
     cooldown: int = 0  # 冷却回合数
+    condition_checks: Tuple[ConditionCheck, ...] = field(init=False, repr=False, compare=False)  # 编译后的条件检查
+    
+    def __post_init__(self):
+        # 冻结的dataclass只能经object.__setattr__在初始化时规范化字段
+        set_field = object.__setattr__
+        # 驻留名称与条件描述，与注册表键共享同一对象
+        set_field(self, "name", sys.intern(self.name))
+        set_field(self, "effects", tuple(dict(self.effects).items()))
+        set_field(self, "conditions", tuple(sys.intern(condition) for condition in self.conditions))
+        set_field(self, "condition_checks", tuple(
+            _CONDITION_REGISTRY.get(condition, _condition_always_met) for condition in self.conditions))
+    
+def _build_strategy_actions() -> Dict[str, StrategyAction]:
+    """构建策略行动表"""
+    actions = {}
     
+    # 变卦策略
+    actions["single_line_change"] = StrategyAction(
+        name="一爻变",
+        description="改变一个爻位，获得新的卦象力量",
+        strategy_type=StrategyType.TRANSFORMATION,
+        cost=Cost(qi=3, dao_xing=1),
+        effects={"transform_hexagram": True, "power_bonus": 1.2},
+        conditions=("拥有至少一个卦象", "气≥3"),
+        cooldown=2
+    )
+    
+    actions["double_line_change"] = StrategyAction(
+        name="二爻变",
+        description="同时改变两个爻位，获得强大的变化力量",
+        strategy_type=StrategyType.TRANSFORMATION,
+        cost=Cost(qi=5, dao_xing=2),
+        effects={"transform_hexagram": True, "power_bonus": 1.5, "extra_action": 1},
+        conditions=("拥有至少一个卦象", "气≥5", "道行≥2"),
+        cooldown=3
+    )
+    
+    actions["mutual_hexagram"] = StrategyAction(
+        name="互卦显现",
+        description="显现卦象的互卦，获得内在变化的力量",
+        strategy_type=StrategyType.TRANSFORMATION,
+        cost=Cost(dao_xing=3),
+        effects={"reveal_mutual": True, "insight_bonus": 2},
+        conditions=("拥有至少一个卦象", "道行≥3"),
+        cooldown=4
+    )
+    
+    actions["inverse_harmony"] = StrategyAction(
+        name="错卦和谐",
+        description="与错卦建立联系，获得阴阳平衡的力量",
+        strategy_type=StrategyType.BALANCE,
+        cost=Cost(cheng_yi=3),
+        effects={"yin_yang_balance": 0.5, "stability_bonus": True},
+        conditions=("拥有至少一个卦象", "诚意≥3"),
+        cooldown=3
+    )
+    
+    # 协同策略
+    actions["elemental_synergy"] = StrategyAction(
+        name="五行协同",
+        description="激活五行相生相克的协同效应",
+        strategy_type=StrategyType.SYNERGY,
+        cost=Cost(qi=4, dao_xing=2),
+        effects={"wuxing_synergy": True, "resource_efficiency": 1.3},
+        conditions=("拥有不同五行属性的卦象≥3",),
+        cooldown=2
+    )
+    
+    actions["yin_yang_unity"] = StrategyAction(
+        name="阴阳合一",
+        description="平衡阴阳，获得和谐统一的力量",
+        strategy_type=StrategyType.SYNERGY,
+        cost=Cost(qi=3, cheng_yi=2),
+        effects={"yin_yang_unity": True, "all_actions_enhanced": True},
+        conditions=("阴阳平衡度≥0.4",),
+        cooldown=4
+    )
+    
+    actions["trigram_mastery"] = StrategyAction(
+        name="八卦精通",
+        description="展现对八卦的深度理解，获得全面提升",
+        strategy_type=StrategyType.SYNERGY,
+        cost=Cost(dao_xing=5),
+        effects={"mastery_bonus": True, "all_costs_reduced": 0.8},
+        conditions=("掌握不同八卦≥4",),
+        cooldown=5
+    )
+    
+    # 平衡策略
+    actions["cosmic_balance"] = StrategyAction(
+        name="宇宙平衡",
+        description="达到天地人三才的完美平衡",
+        strategy_type=StrategyType.BALANCE,
+        cost=Cost(qi=6, dao_xing=3, cheng_yi=3),
+        effects={"cosmic_balance": True, "victory_progress": 2},
+        conditions=("拥有天、地、人各属性卦象",),
+        cooldown=6
+    )
+    
+    # 时机策略
+    actions["perfect_timing"] = StrategyAction(
+        name="天时地利",
+        description="把握完美时机，所有行动效果翻倍",
+        strategy_type=StrategyType.TIMING,
+        cost=Cost(cheng_yi=4),
+        effects={"timing_bonus": 2.0, "duration": 1},
+        conditions=("连续3回合未使用策略行动",),
+        cooldown=3
+    )
+    
+    actions["seasonal_adaptation"] = StrategyAction(
+        name="顺应时序",
+        description="根据游戏阶段调整策略，获得适应性加成",
+        strategy_type=StrategyType.ADAPTATION,
+        cost=Cost(dao_xing=2),
+        effects={"adaptation_bonus": True, "flexibility": 1},
+        conditions=("游戏进行≥5回合",),
+        cooldown=2
+    )
+    
+    return actions
+
+# 策略行动表只构建一次，各系统实例持有自己的副本（行动本身不可变，可以共享）
+_STRATEGY_ACTIONS: Dict[str, StrategyAction] = _build_strategy_actions()
+
+# 策略名称 -> 行动ID 反向索引
+_ACTION_ID_BY_NAME: Dict[str, str] = {
+    action.name: action_id for action_id, action in _STRATEGY_ACTIONS.items()
+}
+
 @dataclass
-class PlayerStrategy:
-    """玩家策略状态"""
-    active_strategies: List[str] = field(default_factory=list)
-    strategy_cooldowns: Dict[str, int] = field(default_factory=dict)
-    hexagram_mastery: Dict[str, int] = field(default_factory=dict)  # 卦象掌握度
-    transformation_history: List[Tuple[str, str]] = field(default_factory=list)  # 变卦历史
-    synergy_bonus: float = 1.0
+class StrategyResult:
+    """策略执行结果：执行过程产生的消息，由调用方决定是否显示"""
+    action_name: str
+    messages: List[Tuple[str, str]] = field(default_factory=list)  # (文本, 样式)
     
+    def add(self, text: str, style: str = "info"):
+        """追加一条消息"""
+        self.messages.append((text, style))
+
+# 选择回调: (标题, 选项, 提示) -> 选中的下标（从0开始），输入无效时返回None
+Chooser = Callable[[str, List[str], str], Optional[int]]
+
 class AdvancedStrategySystem:
-    """高级策略系统"""
+    """高级策略系统（可用性判定与执行，不做任何界面输出）"""
     
-    def __init__(self):
-        self.strategy_actions = self._initialize_strategy_actions()
+    def __init__(self, seed: Optional[int] = None):
+        self.strategy_actions = dict(_STRATEGY_ACTIONS)
+        # 独立的随机数生成器，传入seed可复现随机选择
+        self._rng = random.Random(seed)
+        # 效果名 -> 处理函数 (玩家, 游戏状态, 效果字典, 执行结果)
+        self._effect_handlers: Dict[str, Callable[..., None]] = {
+            "transform_hexagram": self._handle_hexagram_transformation,
+            "reveal_mutual": lambda player, game_state, effects, result, chooser:
+                self._handle_mutual_hexagram(player, game_state, result),
+            "yin_yang_balance": self._apply_yin_yang_balance,
+            "wuxing_synergy": lambda player, game_state, effects, result, chooser:
+                self._handle_wuxing_synergy(player, game_state, result),
+            "power_bonus": lambda player, game_state, effects, result, chooser: result.add(
+                f"获得 {effects['power_bonus']:.1f}x 力量加成", "achievement"),  # 临时增强效果
+            "extra_action": lambda player, game_state, effects, result, chooser: result.add(
+                f"获得 {effects['extra_action']} 次额外行动", "achievement"),
+            "insight_bonus": self._apply_insight_bonus,
+            "cosmic_balance": lambda player, game_state, effects, result, chooser: result.add(
+                "达到宇宙平衡状态！", "achievement"),  # 可以添加特殊的胜利进度
+            "timing_bonus": lambda player, game_state, effects, result, chooser: result.add(
+                f"获得 {effects['timing_bonus']:.1f}x 时机加成", "achievement"),
+        }
         self.player_strategies: Dict[str, PlayerStrategy] = {}
+        # 玩家名 -> (游戏状态的弱引用, 回合, 控制区域汇总)；系统实例可能被多局游戏共用，按游戏状态区分
+        self._controlled_cache: Dict[str, Tuple[weakref.ref, int, ControlledZones]] = {}
+        # 玩家名 -> (状态签名, 满足资源与特殊条件的行动)
+        self._eligible_cache: Dict[str, Tuple[Tuple, List[Tuple[str, StrategyAction]]]] = {}
         
-    def _initialize_strategy_actions(self) -> Dict[str, StrategyAction]:
-        """初始化策略行动"""
-        actions = {}
-        
-        # 变卦策略
-        actions["single_line_change"] = StrategyAction(
-            name="一爻变",
-            description="改变一个爻位，获得新的卦象力量",
-            strategy_type=StrategyType.TRANSFORMATION,
-            cost={"qi": 3, "dao_xing": 1},
-            effects={"transform_hexagram": True, "power_bonus": 1.2},
-            conditions=["拥有至少一个卦象", "气≥3"],
-            cooldown=2
-        )
-        
-        actions["double_line_change"] = StrategyAction(
-            name="二爻变",
-            description="同时改变两个爻位，获得强大的变化力量",
-            strategy_type=StrategyType.TRANSFORMATION,
-            cost={"qi": 5, "dao_xing": 2},
-            effects={"transform_hexagram": True, "power_bonus": 1.5, "extra_action": 1},
-            conditions=["拥有至少一个卦象", "气≥5", "道行≥2"],
-            cooldown=3
-        )
-        
-        actions["mutual_hexagram"] = StrategyAction(
-            name="互卦显现",
-            description="显现卦象的互卦，获得内在变化的力量",
-            strategy_type=StrategyType.TRANSFORMATION,
-            cost={"dao_xing": 3},
-            effects={"reveal_mutual": True, "insight_bonus": 2},
-            conditions=["拥有至少一个卦象", "道行≥3"],
-            cooldown=4
-        )
-        
-        actions["inverse_harmony"] = StrategyAction(
-            name="错卦和谐",
-            description="与错卦建立联系，获得阴阳平衡的力量",
-            strategy_type=StrategyType.BALANCE,
-            cost={"cheng_yi": 3},
-            effects={"yin_yang_balance": 0.5, "stability_bonus": True},
-            conditions=["拥有至少一个卦象", "诚意≥3"],
-            cooldown=3
-        )
-        
-        # 协同策略
-        actions["elemental_synergy"] = StrategyAction(
-            name="五行协同",
-            description="激活五行相生相克的协同效应",
-            strategy_type=StrategyType.SYNERGY,
-            cost={"qi": 4, "dao_xing": 2},
-            effects={"wuxing_synergy": True, "resource_efficiency": 1.3},
-            conditions=["拥有不同五行属性的卦象≥3"],
-            cooldown=2
-        )
-        
-        actions["yin_yang_unity"] = StrategyAction(
-            name="阴阳合一",
-            description="平衡阴阳，获得和谐统一的力量",
-            strategy_type=StrategyType.SYNERGY,
-            cost={"qi": 3, "cheng_yi": 2},
-            effects={"yin_yang_unity": True, "all_actions_enhanced": True},
-            conditions=["阴阳平衡度≥0.4"],
-            cooldown=4
-        )
-        
-        actions["trigram_mastery"] = StrategyAction(
-            name="八卦精通",
-            description="展现对八卦的深度理解，获得全面提升",
-            strategy_type=StrategyType.SYNERGY,
-            cost={"dao_xing": 5},
-            effects={"mastery_bonus": True, "all_costs_reduced": 0.8},
-            conditions=["掌握不同八卦≥4"],
-            cooldown=5
-        )
-        
-        # 平衡策略
-        actions["cosmic_balance"] = StrategyAction(
-            name="宇宙平衡",
-            description="达到天地人三才的完美平衡",
-            strategy_type=StrategyType.BALANCE,
-            cost={"qi": 6, "dao_xing": 3, "cheng_yi": 3},
-            effects={"cosmic_balance": True, "victory_progress": 2},
-            conditions=["拥有天、地、人各属性卦象"],
-            cooldown=6
-        )
-        
-        # 时机策略
-        actions["perfect_timing"] = StrategyAction(
-            name="天时地利",
-            description="把握完美时机，所有行动效果翻倍",
-            strategy_type=StrategyType.TIMING,
-            cost={"cheng_yi": 4},
-            effects={"timing_bonus": 2.0, "duration": 1},
-            conditions=["连续3回合未使用策略行动"],
-            cooldown=3
-        )
-        
-        actions["seasonal_adaptation"] = StrategyAction(
-            name="顺应时序",
-            description="根据游戏阶段调整策略，获得适应性加成",
-            strategy_type=StrategyType.ADAPTATION,
-            cost={"dao_xing": 2},
-            effects={"adaptation_bonus": True, "flexibility": 1},
-            conditions=["游戏进行≥5回合"],
-            cooldown=2
-        )
-        
-        return actions
-    
     def initialize_player_strategy(self, player_name: str):
         """初始化玩家策略状态"""
         if player_name not in self.player_strategies:
             self.player_strategies[player_name] = PlayerStrategy()
     
+    def _controlled_zones(self, player: Player, game_state: GameState,
+                          refresh: bool = False) -> ControlledZones:
+        """
+        获取玩家控制区域汇总，同一游戏状态的同一回合内复用扫描结果
+        
+        区域控制在回合内也可能变化（如check_zone_control），查询可用策略与执行策略时
+        传入refresh=True重新扫描一次，执行过程中的各效果再复用这次扫描
+        """
+        cached = self._controlled_cache.get(player.name)
+        if (refresh or cached is None or cached[0]() is not game_state
+                or cached[1] != game_state.turn):
+            controlled = _scan_controlled_zones(player.name, game_state.board.gua_zones)
+            self._controlled_cache[player.name] = (weakref.ref(game_state), game_state.turn, controlled)
+            return controlled
+        return cached[2]
+    
     def get_available_strategies(self, player: Player, game_state: GameState) -> List[StrategyAction]:
         """获取玩家可用的策略行动"""
         self.initialize_player_strategy(player.name)
         player_strategy = self.player_strategies[player.name]
-        
-        available = []
-        
-        for action_id, action in self.strategy_actions.items():
-            # 检查冷却时间
-            if action_id in player_strategy.strategy_cooldowns:
-                if player_strategy.strategy_cooldowns[action_id] > 0:
+        controlled = self._controlled_zones(player, game_state, refresh=True)
+        
+        # 资源与特殊条件的结果只依赖签名中的状态，状态不变时直接复用
+        signature = (game_state.turn, player.qi, player.dao_xing, player.cheng_yi,
+                     player.yin_yang_balance, player_strategy.last_strategy_turn,
+                     tuple(controlled.zones))
+        cached = self._eligible_cache.get(player.name)
+        if cached is not None and cached[0] == signature:
+            eligible = cached[1]
+        else:
+            eligible = []
+            for action_id, action in self.strategy_actions.items():
+                # 先检查资源条件（几次比较），再检查特殊条件
+                if not self._check_resource_conditions(player, action.cost):
                     continue
-            
-            # 检查资源条件
-            if not self._check_resource_conditions(player, action.cost):
-                continue
-            
-            # 检查特殊条件
-            if self._check_special_conditions(player, game_state, action.conditions):
-                available.append(action)
-        
-        return available
+                if self._check_special_conditions(player, game_state, action.condition_checks, controlled):
+                    eligible.append((action_id, action))
+            self._eligible_cache[player.name] = (signature, eligible)
+        
+        # 检查冷却时间
+        cooldowns = player_strategy.strategy_cooldowns
+        return [action for action_id, action in eligible
+                if cooldowns.get(action_id, 0) <= game_state.turn]
     
-    def _check_resource_conditions(self, player: Player, cost: Dict[str, int]) -> bool:
+    def _check_resource_conditions(self, player: Player, cost: Cost) -> bool:
         """检查资源条件"""
-        if cost.get("qi", 0) > player.qi:
-            return False
-        if cost.get("dao_xing", 0) > player.dao_xing:
-            return False
-        if cost.get("cheng_yi", 0) > player.cheng_yi:
-            return False
-        return True
+        return (cost.qi <= player.qi
+                and cost.dao_xing <= player.dao_xing
+                and cost.cheng_yi <= player.cheng_yi)
     
     def _check_special_conditions(self, player: Player, game_state: GameState, 
-                                conditions: List[str]) -> bool:
+                                condition_checks: Tuple[ConditionCheck, ...],
+                                controlled: ControlledZones) -> bool:
         """检查特殊条件"""
         player_strategy = self.player_strategies[player.name]
-        
-        for condition in conditions:
-            if "拥有至少一个卦象" in condition:
-                # 检查玩家是否控制任何卦象区域
-                controlled_zones = sum(1 for zone_data in game_state.board.gua_zones.values() 
-                                     if zone_data.get("controller") == player.name)
-                if controlled_zones == 0:
-                    return False
-            
-            elif "拥有不同五行属性的卦象≥3" in condition:
-                # 检查五行多样性
-                controlled_elements = set()
-                for zone_name, zone_data in game_state.board.gua_zones.items():
-                    if zone_data.get("controller") == player.name:
-                        if zone_name in GUA_64_INFO:
-                            controlled_elements.add(GUA_64_INFO[zone_name]["element"])
-                if len(controlled_elements) < 3:
-                    return False
-            
-            elif "阴阳平衡度≥0.4" in condition:
-                if abs(player.yin_yang_balance - 0.5) > 0.1:
-                    return False
-            
-            elif "掌握不同八卦≥4" in condition:
-                # 检查八卦掌握度
-                mastered_trigrams = set()
-                for zone_name, zone_data in game_state.board.gua_zones.items():
-                    if zone_data.get("controller") == player.name:
-                        if zone_name in GUA_64_INFO:
-                            trigrams = GUA_64_INFO[zone_name]["trigrams"]
-                            mastered_trigrams.update(trigrams)
-                if len(mastered_trigrams) < 4:
-                    return False
-            
-            elif "连续3回合未使用策略行动" in condition:
-                # 检查策略使用历史
-                if len(player_strategy.active_strategies) > 0:
-                    return False
-            
-            # 添加更多条件检查...
-        
-        return True
+        return all(check(player, game_state, player_strategy, controlled)
+                   for check in condition_checks)
     
     def execute_strategy_action(self, player: Player, game_state: GameState, 
-                              action: StrategyAction) -> GameState:
-        """执行策略行动"""
+                              action: StrategyAction,
+                              chooser: Optional[Chooser] = None) -> StrategyResult:
+        """执行策略行动
+        
+        chooser 用于需要玩家选择的效果（如变卦）；不传时随机选择，供AI等无界面调用。
+        """
         self.initialize_player_strategy(player.name)
         player_strategy = self.player_strategies[player.name]
+        result = StrategyResult(action.name)
+        if chooser is None:
+            chooser = self._random_chooser
+        # 效果处理读取控制区域汇总，执行前按当前棋盘重新扫描
+        self._controlled_zones(player, game_state, refresh=True)
         
         # 消耗资源
-        player.qi -= action.cost.get("qi", 0)
-        player.dao_xing -= action.cost.get("dao_xing", 0)
-        player.cheng_yi -= action.cost.get("cheng_yi", 0)
+        cost = action.cost
+        player.qi -= cost.qi
+        player.dao_xing -= cost.dao_xing
+        player.cheng_yi -= cost.cheng_yi
         
         # 应用效果
-        self._apply_strategy_effects(player, game_state, action)
+        self._apply_strategy_effects(player, game_state, action, result, chooser)
         
         # 设置冷却时间
         action_id = self._get_action_id(action)
         if action_id:
-            player_strategy.strategy_cooldowns[action_id] = action.cooldown
+            player_strategy.strategy_cooldowns[action_id] = game_state.turn + action.cooldown
         
         # 记录策略使用
-        player_strategy.active_strategies.append(action.name)
+        player_strategy.last_strategy_turn = game_state.turn
         
-        enhanced_print(f"{player.name} 使用了策略: {action.name}", "success")
-        enhanced_print(action.description, "info")
+        result.add(f"{player.name} 使用了策略: {action.name}", "success")
+        result.add(action.description, "info")
         
-        return game_state
+        return result
+    
+    def _random_chooser(self, title: str, options: List[str], prompt: str) -> Optional[int]:
+        """无界面时的默认选择：随机选一项"""
+        return self._rng.randrange(len(options))
     
     def _get_action_id(self, action: StrategyAction) -> Optional[str]:
         """获取行动ID"""
-        for action_id, stored_action in self.strategy_actions.items():
-            if stored_action.name == action.name:
-                return action_id
-        return None
+        return _ACTION_ID_BY_NAME.get(action.name)
     
     def _apply_strategy_effects(self, player: Player, game_state: GameState, 
-                              action: StrategyAction):
+                              action: StrategyAction, result: StrategyResult,
+                              chooser: Chooser):
         """应用策略效果"""
-        effects = action.effects
-        
-        if effects.get("transform_hexagram"):
-            self._handle_hexagram_transformation(player, game_state, effects)
-        
-        if effects.get("reveal_mutual"):
-            self._handle_mutual_hexagram(player, game_state)
-        
-        if effects.get("yin_yang_balance"):
-            player.yin_yang_balance = effects["yin_yang_balance"]
-            enhanced_print("阴阳达到完美平衡", "achievement")
+        effects = dict(action.effects)
         
-        if effects.get("wuxing_synergy"):
-            self._handle_wuxing_synergy(player, game_state)
-        
-        if effects.get("power_bonus"):
-            # 临时增强效果
-            enhanced_print(f"获得 {effects['power_bonus']:.1f}x 力量加成", "achievement")
-        
-        if effects.get("extra_action"):
-            enhanced_print(f"获得 {effects['extra_action']} 次额外行动", "achievement")
-        
-        if effects.get("insight_bonus"):
-            player.dao_xing += effects["insight_bonus"]
-            enhanced_print(f"获得 {effects['insight_bonus']} 点道行洞察", "achievement")
-        
-        if effects.get("cosmic_balance"):
-            enhanced_print("达到宇宙平衡状态！", "achievement")
-            # 可以添加特殊的胜利进度
-        
-        if effects.get("timing_bonus"):
-            enhanced_print(f"获得 {effects['timing_bonus']:.1f}x 时机加成", "achievement")
+        # 只遍历行动实际带有的效果
+        for effect_name, value in action.effects:
+            handler = self._effect_handlers.get(effect_name)
+            if handler is not None and value:
+                handler(player, game_state, effects, result, chooser)
+    
+    def _apply_yin_yang_balance(self, player: Player, game_state: GameState, effects: Dict,
+                                result: StrategyResult, chooser: Chooser):
+        """阴阳平衡效果"""
+        player.yin_yang_balance = effects["yin_yang_balance"]
+        result.add("阴阳达到完美平衡", "achievement")
+    
+    def _apply_insight_bonus(self, player: Player, game_state: GameState, effects: Dict,
+                             result: StrategyResult, chooser: Chooser):
+        """道行洞察效果"""
+        player.dao_xing += effects["insight_bonus"]
+        result.add(f"获得 {effects['insight_bonus']} 点道行洞察", "achievement")
     
     def _handle_hexagram_transformation(self, player: Player, game_state: GameState, 
-                                      effects: Dict):
+                                      effects: Dict, result: StrategyResult, chooser: Chooser):
         """处理卦象变化"""
         # 获取玩家控制的卦象
-        controlled_hexagrams = []
-        for zone_name, zone_data in game_state.board.gua_zones.items():
-            if zone_data.get("controller") == player.name:
-                controlled_hexagrams.append(zone_name)
+        controlled_hexagrams = self._controlled_zones(player, game_state).zones
         
         if not controlled_hexagrams:
             return
         
         # 让玩家选择要变化的卦象
-        enhanced_print("选择要进行变化的卦象:", "info")
-        for i, gua_name in enumerate(controlled_hexagrams, 1):
-            print(f"{i}. {gua_name}")
-        
-        try:
-            choice = int(enhanced_input("请选择 (输入数字): ")) - 1
-            if 0 <= choice < len(controlled_hexagrams):
-                selected_gua = controlled_hexagrams[choice]
-                
-                # 获取可能的变化
-                relations = enhanced_hexagram_system.get_hexagram_relations(selected_gua)
-                change_relations = [r for r in relations 
-                                  if r.relation_type == HexagramRelationType.CHANGED]
-                
-                if change_relations:
-                    # 随机选择一个变化或让玩家选择
-                    if len(change_relations) == 1:
-                        target_relation = change_relations[0]
-                    else:
-                        enhanced_print("可能的变化:", "info")
-                        for i, relation in enumerate(change_relations[:3], 1):
-                            print(f"{i}. {relation.related} - {relation.description}")
-                        
-                        try:
-                            change_choice = int(enhanced_input("选择变化 (输入数字): ")) - 1
-                            if 0 <= change_choice < len(change_relations):
-                                target_relation = change_relations[change_choice]
-                            else:
-                                target_relation = random.choice(change_relations)
-                        except ValueError:
-                            target_relation = random.choice(change_relations)
-                    
-                    # 执行变化
-                    target_gua = target_relation.related
-                    enhanced_print(f"{selected_gua} 变化为 {target_gua}!", "success")
-                    
-                    # 更新游戏状态（这里需要根据具体游戏机制实现）
-                    # 例如：改变区域控制、获得新的能力等
-                    
-                    # 记录变化历史
-                    player_strategy = self.player_strategies[player.name]
-                    player_strategy.transformation_history.append((selected_gua, target_gua))
-                    
-        except ValueError:
-            enhanced_print("无效选择", "warning")
+        choice = chooser("选择要进行变化的卦象:", controlled_hexagrams, "请选择 (输入数字): ")
+        if choice is None:
+            result.add("无效选择", "warning")
+            return
+        if not 0 <= choice < len(controlled_hexagrams):
+            return
+        selected_gua = controlled_hexagrams[choice]
+        
+        # 获取可能的变化
+        relations = enhanced_hexagram_system.get_hexagram_relations(selected_gua)
+        change_relations = [r for r in relations 
+                          if r.relation_type == HexagramRelationType.CHANGED]
+        
+        if not change_relations:
+            return
+        
+        # 随机选择一个变化或让玩家选择
+        if len(change_relations) == 1:
+            target_relation = change_relations[0]
+        else:
+            options = [f"{relation.related} - {relation.description}"
+                       for relation in change_relations[:3]]
+            change_choice = chooser("可能的变化:", options, "选择变化 (输入数字): ")
+            if change_choice is not None and 0 <= change_choice < len(change_relations):
+                target_relation = change_relations[change_choice]
+            else:
+                target_relation = change_relations[self._rng.randrange(len(change_relations))]
+        
+        # 执行变化
+        target_gua = target_relation.related
+        result.add(f"{selected_gua} 变化为 {target_gua}!", "success")
+        
+        # 更新游戏状态（这里需要根据具体游戏机制实现）
+        # 例如：改变区域控制、获得新的能力等
+        
+        # 记录变化历史
+        player_strategy = self.player_strategies[player.name]
+        player_strategy.transformation_history.append((selected_gua, target_gua))
+        player_strategy.transformation_count += 1
     
-    def _handle_mutual_hexagram(self, player: Player, game_state: GameState):
+    def _handle_mutual_hexagram(self, player: Player, game_state: GameState,
+                                result: StrategyResult):
         """处理互卦显现"""
-        controlled_hexagrams = []
-        for zone_name, zone_data in game_state.board.gua_zones.items():
-            if zone_data.get("controller") == player.name:
-                controlled_hexagrams.append(zone_name)
-        
-        for gua_name in controlled_hexagrams:
+        for gua_name in self._controlled_zones(player, game_state).zones:
             relations = enhanced_hexagram_system.get_hexagram_relations(gua_name)
             mutual_relations = [r for r in relations 
                               if r.relation_type == HexagramRelationType.MUTUAL]
             
             if mutual_relations:
                 mutual_gua = mutual_relations[0].related
-                enhanced_print(f"{gua_name} 的互卦 {mutual_gua} 显现!", "achievement")
+                result.add(f"{gua_name} 的互卦 {mutual_gua} 显现!", "achievement")
                 
                 # 可以给予特殊洞察或能力
                 player.dao_xing += 2
     
-    def _handle_wuxing_synergy(self, player: Player, game_state: GameState):
+    def _handle_wuxing_synergy(self, player: Player, game_state: GameState,
+                               result: StrategyResult):
         """处理五行协同效应"""
-        controlled_elements = {}
-        for zone_name, zone_data in game_state.board.gua_zones.items():
-            if zone_data.get("controller") == player.name:
-                if zone_name in GUA_64_INFO:
-                    element = GUA_64_INFO[zone_name]["element"]
-                    controlled_elements[element] = controlled_elements.get(element, 0) + 1
+        # 协同奖励只取决于不同五行的数量，直接复用控制区域汇总
+        distinct_elements = self._controlled_zones(player, game_state).element_count
         
         # 计算五行协同奖励
-        synergy_bonus = len(controlled_elements) * 0.1
+        synergy_bonus = distinct_elements * 0.1
         player_strategy = self.player_strategies[player.name]
         player_strategy.synergy_bonus += synergy_bonus
         
-        enhanced_print(f"五行协同激活! 获得 {synergy_bonus:.1f} 协同加成", "achievement")
+        result.add(f"五行协同激活! 获得 {synergy_bonus:.1f} 协同加成", "achievement")
+
+class StrategyMenuView:
+    """策略系统的终端界面：菜单、状态与执行结果的显示"""
+    
+    def __init__(self, system: AdvancedStrategySystem):
+        self.system = system
+    
+    def _prompt_int(self, prompt: str) -> Optional[int]:
+        """读取一个整数；输入不是整数时返回None（先校验再转换，不抛异常）"""
+        text = enhanced_input(prompt).strip()
+        digits = text[1:] if text[:1] in ("+", "-") else text
+        return int(text) if digits.isdecimal() else None
+    
+    def choose(self, title: str, options: List[str], prompt: str) -> Optional[int]:
+        """列出选项并读取玩家输入（作为执行策略时的选择回调）"""
+        enhanced_print(title, "info")
+        for i, option in enumerate(options, 1):
+            print(f"{i}. {option}")
+        choice = self._prompt_int(prompt)
+        return None if choice is None else choice - 1
     
-    def update_cooldowns(self, player_name: str):
-        """更新冷却时间"""
-        if player_name in self.player_strategies:
-            player_strategy = self.player_strategies[player_name]
-            for action_id in list(player_strategy.strategy_cooldowns.keys()):
-                player_strategy.strategy_cooldowns[action_id] -= 1
-                if player_strategy.strategy_cooldowns[action_id] <= 0:
-                    del player_strategy.strategy_cooldowns[action_id]
+    def show_result(self, result: StrategyResult):
+        """显示策略执行结果"""
+        for text, style in result.messages:
+            enhanced_print(text, style)
+    
+    def execute_strategy_action(self, player: Player, game_state: GameState,
+                                action: StrategyAction) -> StrategyResult:
+        """交互式执行策略行动并显示结果"""
+        result = self.system.execute_strategy_action(player, game_state, action, chooser=self.choose)
+        self.show_result(result)
+        return result
     
     def display_strategy_menu(self, player: Player, game_state: GameState):
         """显示策略菜单"""
-        available_strategies = self.get_available_strategies(player, game_state)
+        available_strategies = self.system.get_available_strategies(player, game_state)
         
         if not available_strategies:
             enhanced_print("当前没有可用的策略行动", "info")
@@ -439,7 +604,7 @@ class AdvancedStrategySystem:
         rows = []
         
         for i, action in enumerate(available_strategies, 1):
-            cost_str = ", ".join([f"{k}:{v}" for k, v in action.cost.items()])
+            cost_str = action.cost.format()
             rows.append([
                 str(i),
                 action.name,
@@ -453,46 +618,47 @@ class AdvancedStrategySystem:
         print()
         
         # 显示玩家当前状态
-        self._display_player_strategy_status(player)
+        self._display_player_strategy_status(player, game_state)
         
-        try:
-            choice = enhanced_input("选择策略 (输入数字，0返回): ")
-            if choice == "0":
-                return None
-            
-            choice_num = int(choice)
-            if 1 <= choice_num <= len(available_strategies):
-                selected_action = available_strategies[choice_num - 1]
-                
-                # 显示详细信息并确认
-                self._display_strategy_details(selected_action)
-                confirm = enhanced_input("确认使用此策略? (y/n): ").lower()
-                
-                if confirm == 'y':
-                    return selected_action
-            else:
-                enhanced_print("无效选择", "warning")
-                
-        except ValueError:
+        choice_num = self._prompt_int("选择策略 (输入数字，0返回): ")
+        if choice_num is None:
             enhanced_print("请输入有效数字", "error")
+            return None
+        if choice_num == 0:
+            return None
+        if not 1 <= choice_num <= len(available_strategies):
+            enhanced_print("无效选择", "warning")
+            return None
+        
+        selected_action = available_strategies[choice_num - 1]
+        
+        # 显示详细信息并确认
+        self._display_strategy_details(selected_action)
+        confirm = enhanced_input("确认使用此策略? (y/n): ").lower()
         
+        if confirm == 'y':
+            return selected_action
         return None
     
-    def _display_player_strategy_status(self, player: Player):
+    def _display_player_strategy_status(self, player: Player, game_state: GameState):
         """显示玩家策略状态"""
-        player_strategy = self.player_strategies.get(player.name)
+        player_strategy = self.system.player_strategies.get(player.name)
         if not player_strategy:
             return
         
         print(ui_enhancement.create_section_header("策略状态"))
         print(f"协同加成: {player_strategy.synergy_bonus:.2f}x")
-        print(f"变化历史: {len(player_strategy.transformation_history)} 次")
+        print(f"变化历史: {player_strategy.transformation_count} 次")
         
-        if player_strategy.strategy_cooldowns:
+        cooling = [(action_id, ready_turn - game_state.turn)
+                   for action_id, ready_turn in player_strategy.strategy_cooldowns.items()
+                   if ready_turn > game_state.turn]
+        if cooling:
             print("冷却中的策略:")
-            for action_id, cooldown in player_strategy.strategy_cooldowns.items():
-                action_name = self.strategy_actions.get(action_id, {}).get("name", action_id)
-                print(f"  {action_name}: {cooldown} 回合")
+            for action_id, remaining in cooling:
+                action = self.system.strategy_actions.get(action_id)
+                action_name = action.name if action else action_id
+                print(f"  {action_name}: {remaining} 回合")
         print()
     
     def _display_strategy_details(self, action: StrategyAction):
@@ -501,13 +667,14 @@ class AdvancedStrategySystem:
         print(f"名称: {action.name}")
         print(f"类型: {action.strategy_type.value}")
         print(f"描述: {action.description}")
-        print(f"消耗: {', '.join([f'{k}:{v}' for k, v in action.cost.items()])}")
+        print(f"消耗: {action.cost.format()}")
         print(f"冷却: {action.cooldown} 回合")
         print(f"条件: {', '.join(action.conditions)}")
         print()
 
 # 全局实例
 advanced_strategy_system = AdvancedStrategySystem()
+strategy_menu_view = StrategyMenuView(advanced_strategy_system)
 
 def display_hexagram_strategy_guide():
     """显示卦象策略指南"""
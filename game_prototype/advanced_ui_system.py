@@ -56,6 +56,18 @@ class MessageType(Enum):
     MYSTICAL = "mystical"    # 神秘/占卜 - 紫色
     RESOURCE = "resource"    # 资源变化 - 绿色/红色
 
+# 消息类型对应的ANSI颜色
+_MESSAGE_COLORS: Dict[MessageType, str] = {
+    MessageType.SUCCESS: Colors.BRIGHT_GREEN,
+    MessageType.WARNING: Colors.BRIGHT_YELLOW,
+    MessageType.ERROR: Colors.BRIGHT_RED,
+    MessageType.INFO: Colors.BRIGHT_BLUE,
+    MessageType.HIGHLIGHT: Colors.BRIGHT_CYAN,
+    MessageType.PLAYER_INPUT: Colors.YELLOW,
+    MessageType.MYSTICAL: Colors.BRIGHT_MAGENTA,
+    MessageType.RESOURCE: Colors.GREEN
+}
+
 @dataclass
 class DisplaySection:
     """显示区段"""
@@ -64,26 +76,108 @@ class DisplaySection:
     visible: bool = True
     color: str = Colors.WHITE
 
+def _paint(text: str, message_type: MessageType) -> str:
+    """着色一整行（含换行符）"""
+    return f"{_MESSAGE_COLORS[message_type]}{text}{Colors.RESET}\n"
+
+# 固定文本在导入时着色一次，显示时直接写出
+_MYSTICAL_BORDER = _paint("✧" * 60, MessageType.MYSTICAL)
+_MYSTICAL_FOOTER = f"\n{_MYSTICAL_BORDER}\n"
+_DIVIDER_40 = _paint("─" * 40, MessageType.INFO)
+_DIVIDER_60 = _paint("─" * 60, MessageType.INFO)
+_ACTION_HEADER = _paint("═══ 可用行动 ═══", MessageType.HIGHLIGHT)
+_ACTION_FOOTER = "".join([
+    "\n",
+    _paint("输入数字选择行动，或输入命令:", MessageType.PLAYER_INPUT),
+    _paint("  • status - 查看详细状态", MessageType.INFO),
+    _paint("  • board - 查看棋盘状态", MessageType.INFO),
+    _paint("  • yinyang - 查看阴阳平衡", MessageType.INFO),
+    _paint("  • help - 查看帮助", MessageType.INFO),
+    "\n",
+])
+# 核心状态三行的预着色模板
+_STATUS_TEMPLATE = "".join([
+    _paint("【{name}】 [火] AP: {ap} | [电] 气: {qi} | [星] 道行: {dao_xing} | [钻] 诚意: {cheng_yi}",
+           MessageType.RESOURCE),
+    _paint("📍 当前位置: {position}", MessageType.INFO),
+    _paint("[卡牌] 手牌: {hand_size}张", MessageType.INFO),
+])
+# 资源变化行模板，按变化方向(+1/-1)索引
+_RESOURCE_CHANGE_TEMPLATES = {
+    1: _paint("[完成] {name} +{change} ({old} → {new})", MessageType.SUCCESS),
+    -1: _paint("[错误] {name} {change} ({old} → {new})", MessageType.ERROR),
+}
+_BOARD_HEADER = _paint("═══ 棋盘状态 ═══", MessageType.HIGHLIGHT)
+_YINYANG_HEADER = _paint("═══ 阴阳平衡 ═══", MessageType.HIGHLIGHT)
+
+_HELP_SECTIONS = [
+    ("基础命令", [
+        "status - 查看详细玩家状态",
+        "board - 查看棋盘和区域控制情况", 
+        "yinyang - 查看阴阳平衡状态",
+        "help - 显示此帮助信息"
+    ]),
+    ("游戏行动", [
+        "选择数字执行对应行动",
+        "移动 - 在地、人、天之间移动",
+        "冥想 - 获得气资源",
+        "学习 - 获得道行",
+        "演卦 - 打出卦牌影响区域"
+    ]),
+    ("资源说明", [
+        "[火] AP (行动点) - 执行行动所需",
+        "[电] 气 - 基础资源，用于各种行动",
+        "[星] 道行 - 胜利条件之一",
+        "[钻] 诚意 - 影响外交和特殊能力"
+    ])
+]
+
+def _build_help_blob() -> str:
+    """拼装完整的帮助文本"""
+    parts = ["\n", _paint("═══ 游戏帮助 ═══", MessageType.HIGHLIGHT)]
+    for section_title, items in _HELP_SECTIONS:
+        parts.append(_paint(f"▶ {section_title}:", MessageType.INFO))
+        for item in items:
+            parts.append(_paint(f"  • {item}", MessageType.INFO))
+        parts.append("\n")
+    return "".join(parts)
+
+_HELP_BLOB = _build_help_blob()
+
+# 通知图标，连同颜色预先拼好作为行首
+_NOTIFICATION_ICONS = {
+    MessageType.SUCCESS: "[完成]",
+    MessageType.WARNING: "[警告]",
+    MessageType.ERROR: "[错误]",
+    MessageType.INFO: "[信息]",
+    MessageType.HIGHLIGHT: "[星]",
+    MessageType.MYSTICAL: "🔮",
+    MessageType.RESOURCE: "💰"
+}
+_ICONS: Dict[MessageType, str] = {
+    message_type: f"{_MESSAGE_COLORS[message_type]}{_NOTIFICATION_ICONS.get(message_type, '•')} "
+    for message_type in MessageType
+}
+
 class AdvancedUISystem:
     """高级UI系统"""
     
     def __init__(self):
         self.sections: Dict[str, DisplaySection] = {}
-        self.message_colors = {
-            MessageType.SUCCESS: Colors.BRIGHT_GREEN,
-            MessageType.WARNING: Colors.BRIGHT_YELLOW,
-            MessageType.ERROR: Colors.BRIGHT_RED,
-            MessageType.INFO: Colors.BRIGHT_BLUE,
-            MessageType.HIGHLIGHT: Colors.BRIGHT_CYAN,
-            MessageType.PLAYER_INPUT: Colors.YELLOW,
-            MessageType.MYSTICAL: Colors.BRIGHT_MAGENTA,
-            MessageType.RESOURCE: Colors.GREEN
-        }
+        self.message_colors = dict(_MESSAGE_COLORS)
         self.current_view_mode = "minimal"  # minimal, standard, detailed
+        # 整屏输出先攒在缓冲区，方法末尾一次性写出
+        self._buf: List[str] = []
+        # 真实终端下整屏内容直接写文件描述符（Windows控制台和被替换的stdout仍走sys.stdout）
+        self._use_fastwrite = (
+            os.name != "nt" and sys.__stdout__ is not None and sys.__stdout__.isatty()
+        )
         
     def clear_screen(self):
-        """清屏"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        """清屏（直接写ANSI控制序列，不再启动子进程）"""
+        if sys.stdout.isatty():
+            sys.stdout.write("\033[2J\033[H")
+            sys.stdout.flush()
     
     def colorize(self, text: str, message_type: MessageType) -> str:
         """为文本添加颜色"""
@@ -94,6 +188,31 @@ class AdvancedUISystem:
         """打印彩色文本"""
         print(self.colorize(text, message_type))
     
+    def _emit(self, text: str = "", message_type: Optional[MessageType] = None):
+        """向缓冲区追加一行（不带类型时为原样文本）"""
+        if message_type is None:
+            self._buf.append(f"{text}\n")
+        else:
+            self._buf.append(f"{self.colorize(text, message_type)}\n")
+    
+    def _write(self, text: str):
+        """写出一整块文本"""
+        if self._use_fastwrite and sys.stdout is sys.__stdout__:
+            # 先清空print等留在TextIOWrapper中的内容，保证输出顺序
+            sys.stdout.flush()
+            data = memoryview(text.encode(sys.stdout.encoding or "utf-8", "replace"))
+            fd = sys.stdout.fileno()
+            while data:
+                data = data[os.write(fd, data):]
+        else:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+    
+    def _flush(self):
+        """一次性写出缓冲区内容"""
+        self._write("".join(self._buf))
+        self._buf.clear()
+    
     def create_border(self, text: str, width: int = 80, char: str = "═") -> str:
         """创建边框"""
         if len(text) >= width - 4:
@@ -116,140 +235,111 @@ class AdvancedUISystem:
     
     def display_core_status(self, player, show_details: bool = False):
         """显示核心状态（简化版）"""
-        # 核心资源
-        resources = f"[火] AP: {player.action_points} | [电] 气: {player.qi} | [星] 道行: {player.dao_xing} | [钻] 诚意: {player.cheng_yi}"
-        self.print_colored(f"【{player.name}】 {resources}", MessageType.RESOURCE)
-        
-        # 位置信息
-        position_text = f"📍 当前位置: {player.position.value}"
-        self.print_colored(position_text, MessageType.INFO)
-        
-        # 手牌数量
-        hand_text = f"[卡牌] 手牌: {len(player.hand)}张"
-        self.print_colored(hand_text, MessageType.INFO)
+        # 核心资源、位置信息、手牌数量一次格式化
+        status = _STATUS_TEMPLATE.format(
+            name=player.name,
+            ap=player.action_points,
+            qi=player.qi,
+            dao_xing=player.dao_xing,
+            cheng_yi=player.cheng_yi,
+            position=player.position.value,
+            hand_size=len(player.hand),
+        )
         
         if show_details:
             # 显示详细信息
-            self.print_colored("─" * 60, MessageType.INFO)
+            status += _DIVIDER_60
+        self._write(status)
             
     def display_resource_change(self, resource_name: str, old_value: int, new_value: int):
         """显示资源变化"""
         change = new_value - old_value
-        if change > 0:
-            self.print_colored(f"[完成] {resource_name} +{change} ({old_value} → {new_value})", MessageType.SUCCESS)
-        elif change < 0:
-            self.print_colored(f"[错误] {resource_name} {change} ({old_value} → {new_value})", MessageType.ERROR)
+        # 按变化方向查模板（无变化时不显示）
+        template = _RESOURCE_CHANGE_TEMPLATES.get((change > 0) - (change < 0))
+        if template:
+            sys.stdout.write(template.format(
+                name=resource_name, change=change, old=old_value, new=new_value))
     
     def display_action_menu(self, actions: List[str], title: str = "可用行动"):
         """显示行动菜单"""
-        print()
-        self.print_colored(f"═══ {title} ═══", MessageType.HIGHLIGHT)
+        self._emit()
+        if title == "可用行动":
+            self._buf.append(_ACTION_HEADER)
+        else:
+            self._emit(f"═══ {title} ═══", MessageType.HIGHLIGHT)
         
         for i, action in enumerate(actions):
             action_text = f"  {i+1}. {action}"
-            self.print_colored(action_text, MessageType.INFO)
+            self._emit(action_text, MessageType.INFO)
         
-        print()
-        self.print_colored("输入数字选择行动，或输入命令:", MessageType.PLAYER_INPUT)
-        self.print_colored("  • status - 查看详细状态", MessageType.INFO)
-        self.print_colored("  • board - 查看棋盘状态", MessageType.INFO)
-        self.print_colored("  • yinyang - 查看阴阳平衡", MessageType.INFO)
-        self.print_colored("  • help - 查看帮助", MessageType.INFO)
-        print()
+        self._buf.append(_ACTION_FOOTER)
+        self._flush()
     
     def display_mystical_message(self, message: str, title: str = "神谕"):
         """显示神秘信息（占卜、预言等）"""
-        print()
-        mystical_border = "✧" * 60
-        self.print_colored(mystical_border, MessageType.MYSTICAL)
-        self.print_colored(f"    🔮 {title} 🔮", MessageType.MYSTICAL)
-        self.print_colored(mystical_border, MessageType.MYSTICAL)
-        print()
-        
-        # 分行显示消息
-        for line in message.split('\n'):
-            if line.strip():
-                self.print_colored(f"    {line.strip()}", MessageType.MYSTICAL)
-        
-        print()
-        self.print_colored(mystical_border, MessageType.MYSTICAL)
-        print()
+        # 分行显示消息（每行只strip一次，跳过空行）
+        body = "".join(
+            _paint(f"    {line}", MessageType.MYSTICAL)
+            for line in map(str.strip, message.splitlines()) if line
+        )
+        self._write("".join([
+            "\n",
+            _MYSTICAL_BORDER,
+            _paint(f"    🔮 {title} 🔮", MessageType.MYSTICAL),
+            _MYSTICAL_BORDER,
+            "\n",
+            body,
+            _MYSTICAL_FOOTER,
+        ]))
     
     def display_board_status(self, game_state, detailed: bool = False):
         """显示棋盘状态"""
-        print()
-        self.print_colored("═══ 棋盘状态 ═══", MessageType.HIGHLIGHT)
+        self._emit()
+        self._buf.append(_BOARD_HEADER)
         
         for zone_name, zone_data in game_state.board.gua_zones.items():
             if zone_data.get('controller'):
                 controller_name = zone_data['controller']
                 zone_text = f"[区域] 【{zone_name}】: 由 {controller_name} 控制"
-                self.print_colored(zone_text, MessageType.SUCCESS)
+                self._emit(zone_text, MessageType.SUCCESS)
             else:
                 markers = zone_data.get('markers', {})
                 if markers:
                     marker_text = ", ".join([f"{name}: {count}" for name, count in markers.items() if count > 0])
                     zone_text = f"[战斗] 【{zone_name}】: {marker_text}"
-                    self.print_colored(zone_text, MessageType.WARNING)
+                    self._emit(zone_text, MessageType.WARNING)
                 else:
                     zone_text = f"[空白] 【{zone_name}】: 无人控制"
-                    self.print_colored(zone_text, MessageType.INFO)
-        print()
+                    self._emit(zone_text, MessageType.INFO)
+        self._emit()
+        self._flush()
     
     def display_yinyang_status(self, player):
         """显示阴阳平衡状态"""
-        print()
-        self.print_colored("═══ 阴阳平衡 ═══", MessageType.HIGHLIGHT)
+        self._emit()
+        self._buf.append(_YINYANG_HEADER)
         
         yin_yang = player.yin_yang_balance
         yin_text = f"[阴阳] 阴: {yin_yang.yin}"
         yang_text = f"[阴阳] 阳: {yin_yang.yang}"
         
-        self.print_colored(yin_text, MessageType.INFO)
-        self.print_colored(yang_text, MessageType.INFO)
+        self._emit(yin_text, MessageType.INFO)
+        self._emit(yang_text, MessageType.INFO)
         
         # 显示平衡状态
         balance = yin_yang.get_balance_state()
         if balance == "平衡":
-            self.print_colored(f"[平衡] 状态: {balance} (获得额外奖励)", MessageType.SUCCESS)
+            self._emit(f"[平衡] 状态: {balance} (获得额外奖励)", MessageType.SUCCESS)
         elif "偏" in balance:
-            self.print_colored(f"[平衡] 状态: {balance}", MessageType.WARNING)
+            self._emit(f"[平衡] 状态: {balance}", MessageType.WARNING)
         else:
-            self.print_colored(f"[平衡] 状态: {balance}", MessageType.ERROR)
-        print()
+            self._emit(f"[平衡] 状态: {balance}", MessageType.ERROR)
+        self._emit()
+        self._flush()
     
     def display_help(self):
         """显示帮助信息"""
-        print()
-        self.print_colored("═══ 游戏帮助 ═══", MessageType.HIGHLIGHT)
-        
-        help_sections = [
-            ("基础命令", [
-                "status - 查看详细玩家状态",
-                "board - 查看棋盘和区域控制情况", 
-                "yinyang - 查看阴阳平衡状态",
-                "help - 显示此帮助信息"
-            ]),
-            ("游戏行动", [
-                "选择数字执行对应行动",
-                "移动 - 在地、人、天之间移动",
-                "冥想 - 获得气资源",
-                "学习 - 获得道行",
-                "演卦 - 打出卦牌影响区域"
-            ]),
-            ("资源说明", [
-                "[火] AP (行动点) - 执行行动所需",
-                "[电] 气 - 基础资源，用于各种行动",
-                "[星] 道行 - 胜利条件之一",
-                "[钻] 诚意 - 影响外交和特殊能力"
-            ])
-        ]
-        
-        for section_title, items in help_sections:
-            self.print_colored(f"▶ {section_title}:", MessageType.INFO)
-            for item in items:
-                self.print_colored(f"  • {item}", MessageType.INFO)
-            print()
+        self._write(_HELP_BLOB)
     
     def get_player_input(self, prompt: str = "请选择") -> str:
         """获取玩家输入"""
@@ -258,26 +348,14 @@ class AdvancedUISystem:
     
     def display_notification(self, message: str, message_type: MessageType = MessageType.INFO):
         """显示通知"""
-        icons = {
-            MessageType.SUCCESS: "[完成]",
-            MessageType.WARNING: "[警告]",
-            MessageType.ERROR: "[错误]",
-            MessageType.INFO: "[信息]",
-            MessageType.HIGHLIGHT: "[星]",
-            MessageType.MYSTICAL: "🔮",
-            MessageType.RESOURCE: "💰"
-        }
-        
-        icon = icons.get(message_type, "•")
-        self.print_colored(f"{icon} {message}", message_type)
+        sys.stdout.write(f"{_ICONS[message_type]}{message}{Colors.RESET}\n")
     
     def display_section_divider(self, title: str = ""):
         """显示区段分隔符"""
         if title:
-            divider = f"─── {title} ───"
+            self.print_colored(f"─── {title} ───", MessageType.INFO)
         else:
-            divider = "─" * 40
-        self.print_colored(divider, MessageType.INFO)
+            sys.stdout.write(_DIVIDER_40)
     
     def wait_for_continue(self, message: str = "按回车键继续..."):
         """等待用户继续"""
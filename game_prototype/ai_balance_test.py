@@ -8,10 +8,13 @@ AI Intelligence and Game Balance Test
 import sys
 import time
 import random
-import json
-from datetime import datetime
-from typing import Dict, List, Any, Optional
-from collections import defaultdict
+from array import array
+from datetime import datetime, timedelta
+from functools import wraps
+from io import StringIO
+from types import MappingProxyType
+from typing import Deque, Dict, List, Any, Mapping, Optional, Sequence, Tuple
+from collections import defaultdict, deque
 
 # 导入游戏模块
 from game_state import GameState, Player, Avatar, AvatarName
@@ -20,29 +23,126 @@ from multiplayer_manager import create_multiplayer_game
 from core_engine import CoreGameEngine, ActionType
 from bot_player import get_bot_choice
 from enhanced_game_mechanics import enhanced_mechanics
+from json_utils import dump_json
+
+def _max_priority(actions: Dict) -> int:
+    """取所有行动中的最高优先级"""
+    return max(action.get("priority", 5) for action in actions.values())
+
+def _decision_score(chosen_priority: int, max_priority: int) -> float:
+    """按优先级比值计算决策得分 (1-10分)"""
+    if max_priority == 0:
+        return 5.0
+    return min(10.0, chosen_priority / max_priority * 10)
+
+def _meets_threshold(chosen_priority: int, max_priority: int, threshold: float) -> bool:
+    """优先级比值是否达到阈值"""
+    return (chosen_priority / max_priority) >= threshold if max_priority > 0 else True
+
+def _freeze_scenario(actions: Dict[int, Dict[str, Any]]) -> Tuple[Mapping, int]:
+    """冻结场景行动表，并附带其最高优先级"""
+    frozen = MappingProxyType({key: MappingProxyType(action) for key, action in actions.items()})
+    return frozen, _max_priority(frozen)
+
+# AI决策质量测试场景（常量数据，导入时构建一次）
+_SCENARIOS: Tuple[Tuple[Mapping, int], ...] = tuple(_freeze_scenario(actions) for actions in [
+    # 场景1: 优势局面
+    {
+        1: {"action": "play_card", "description": "出强力卡牌", "priority": 9},
+        2: {"action": "meditate", "description": "冥想", "priority": 3},
+        3: {"action": "pass", "description": "跳过", "priority": 1}
+    },
+    # 场景2: 劣势局面
+    {
+        1: {"action": "study", "description": "研习", "priority": 7},
+        2: {"action": "divine", "description": "占卜", "priority": 6},
+        3: {"action": "pass", "description": "跳过", "priority": 2}
+    },
+    # 场景3: 平衡局面
+    {
+        1: {"action": "play_card", "description": "出牌", "priority": 5},
+        2: {"action": "move", "description": "移动", "priority": 5},
+        3: {"action": "meditate", "description": "冥想", "priority": 4}
+    },
+    # 场景4: 资源紧张
+    {
+        1: {"action": "meditate", "description": "冥想恢复", "priority": 8},
+        2: {"action": "study", "description": "研习", "priority": 4},
+        3: {"action": "pass", "description": "跳过", "priority": 3}
+    },
+    # 场景5: 终局阶段
+    {
+        1: {"action": "play_card", "description": "决胜出牌", "priority": 10},
+        2: {"action": "divine", "description": "占卜", "priority": 2},
+        3: {"action": "pass", "description": "跳过", "priority": 1}
+    }
+])
+
+# AI适应性测试的难度场景
+_ADAPTABILITY_SCENARIOS = (
+    ("简单场景", {"complexity": 1, "pressure": 1}),
+    ("中等场景", {"complexity": 5, "pressure": 3}),
+    ("困难场景", {"complexity": 8, "pressure": 7}),
+    ("极限场景", {"complexity": 10, "pressure": 10})
+)
+
+def _summarize(values: Sequence) -> Tuple[float, Any, Any]:
+    """一次取出均值、最小值和最大值"""
+    return sum(values) / len(values), min(values), max(values)
+
+# 测试日志记录的字段（日志按元组存储，输出报告时再组装成字典）
+_LOG_FIELDS = ("时间", "测试", "结果", "详情")
+
+# 测试日志最多保留的条数，超出后自动丢弃最早的记录
+TEST_LOG_LIMIT = 100_000
+
+def _score_array() -> array:
+    """AI指标分数序列（紧凑存储的双精度浮点数组）"""
+    return array("d")
+
+def _flush_log_after(method):
+    """测试阶段结束后一次性输出该阶段缓冲的日志"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._flush_log()
+    return wrapper
 
 class AIBalanceTest:
     """AI智能程度和游戏平衡性测试"""
     
     def __init__(self):
-        self.test_results = []
+        # 日志时间记录为相对开始时刻的纳秒偏移，输出报告时再格式化
+        self.test_results: Deque[Tuple[int, str, str, str]] = deque(maxlen=TEST_LOG_LIMIT)
+        self._log_buffer = StringIO()
         self.game_statistics = defaultdict(int)
-        self.ai_performance = defaultdict(list)
+        self.ai_performance: Dict[str, array] = defaultdict(_score_array)
         self.start_time = datetime.now()
+        self._start_ns = time.monotonic_ns()
         
     def log_test(self, test_name: str, result: str, details: str = ""):
         """记录测试结果"""
-        log_entry = {
-            "时间": datetime.now().strftime("%H:%M:%S"),
-            "测试": test_name,
-            "结果": result,
-            "详情": details
-        }
-        self.test_results.append(log_entry)
-        print(f"🧪 {test_name}: {result}")
+        self.test_results.append((time.monotonic_ns() - self._start_ns, test_name, result, details))
+        self._log_buffer.write(f"🧪 {test_name}: {result}\n")
         if details:
-            print(f"   详情: {details}")
+            self._log_buffer.write(f"   详情: {details}\n")
+    
+    def _format_log_time(self, offset_ns: int) -> str:
+        """把日志的纳秒偏移换算为 HH:MM:SS 时刻"""
+        return (self.start_time + timedelta(microseconds=offset_ns // 1000)).strftime("%H:%M:%S")
     
+    def _flush_log(self):
+        """输出并清空缓冲的日志"""
+        text = self._log_buffer.getvalue()
+        if text:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+            self._log_buffer.seek(0)
+            self._log_buffer.truncate()
+    
+    @_flush_log_after
     def test_ai_decision_quality(self, iterations: int = 10):
         """测试AI决策质量"""
         print(f"\n🤖 测试AI决策质量 ({iterations}次迭代)...")
@@ -52,14 +152,14 @@ class AIBalanceTest:
         for i in range(iterations):
             try:
                 # 创建不同的游戏情况
-                valid_actions = self._create_test_scenarios()[i % 5]
+                valid_actions, max_priority = _SCENARIOS[i % len(_SCENARIOS)]
                 
                 # 记录AI选择
                 ai_choice = get_bot_choice(valid_actions)
                 chosen_action = valid_actions[ai_choice]
                 
                 # 评估决策质量
-                score = self._evaluate_decision_quality(chosen_action, valid_actions)
+                score = self._evaluate_decision_quality(chosen_action, max_priority)
                 decision_scores.append(score)
                 
                 self.ai_performance["决策质量"].append(score)
@@ -76,55 +176,12 @@ class AIBalanceTest:
             self.log_test("AI决策质量", "失败", "无有效决策数据")
             return 0
     
-    def _create_test_scenarios(self) -> List[Dict]:
-        """创建测试场景"""
-        scenarios = [
-            # 场景1: 优势局面
-            {
-                1: {"action": "play_card", "description": "出强力卡牌", "priority": 9},
-                2: {"action": "meditate", "description": "冥想", "priority": 3},
-                3: {"action": "pass", "description": "跳过", "priority": 1}
-            },
-            # 场景2: 劣势局面
-            {
-                1: {"action": "study", "description": "研习", "priority": 7},
-                2: {"action": "divine", "description": "占卜", "priority": 6},
-                3: {"action": "pass", "description": "跳过", "priority": 2}
-            },
-            # 场景3: 平衡局面
-            {
-                1: {"action": "play_card", "description": "出牌", "priority": 5},
-                2: {"action": "move", "description": "移动", "priority": 5},
-                3: {"action": "meditate", "description": "冥想", "priority": 4}
-            },
-            # 场景4: 资源紧张
-            {
-                1: {"action": "meditate", "description": "冥想恢复", "priority": 8},
-                2: {"action": "study", "description": "研习", "priority": 4},
-                3: {"action": "pass", "description": "跳过", "priority": 3}
-            },
-            # 场景5: 终局阶段
-            {
-                1: {"action": "play_card", "description": "决胜出牌", "priority": 10},
-                2: {"action": "divine", "description": "占卜", "priority": 2},
-                3: {"action": "pass", "description": "跳过", "priority": 1}
-            }
-        ]
-        return scenarios
-    
-    def _evaluate_decision_quality(self, chosen_action: Dict, all_actions: Dict) -> float:
+    def _evaluate_decision_quality(self, chosen_action: Dict, max_priority: int) -> float:
         """评估决策质量"""
         # 基于优先级评估决策质量
-        chosen_priority = chosen_action.get("priority", 5)
-        max_priority = max(action.get("priority", 5) for action in all_actions.values())
-        
-        # 计算相对质量分数 (1-10分)
-        if max_priority == 0:
-            return 5.0
-        
-        quality_ratio = chosen_priority / max_priority
-        return min(10.0, quality_ratio * 10)
+        return _decision_score(chosen_action.get("priority", 5), max_priority)
     
+    @_flush_log_after
     def test_game_balance(self, games: int = 20):
         """测试游戏平衡性"""
         print(f"\n⚖️ 测试游戏平衡性 ({games}场游戏)...")
@@ -166,9 +223,9 @@ class AIBalanceTest:
         random.shuffle(deck)
         
         for player in game_state.players:
-            for _ in range(5):
-                if deck:
-                    player.hand.append(deck.pop())
+            # 从牌堆末尾整段取5张（顺序与逐张pop一致）
+            player.hand.extend(reversed(deck[-5:]))
+            del deck[-5:]
         
         # 游戏循环
         while turns < max_turns:
@@ -245,7 +302,8 @@ class AIBalanceTest:
         """模拟人类玩家行动"""
         valid_actions = self._get_valid_actions(player, game_state)
         if valid_actions:
-            choice = random.choice(list(valid_actions.keys()))
+            # 行动编号是从1开始的连续整数，直接随机取号
+            choice = random.randrange(1, len(valid_actions) + 1)
             self._execute_action(player, valid_actions[choice], game_state)
     
     def _check_simple_victory(self, game_state: GameState) -> Optional[Player]:
@@ -277,9 +335,7 @@ class AIBalanceTest:
         
         # 游戏长度分析
         if game_lengths:
-            avg_length = sum(game_lengths) / len(game_lengths)
-            min_length = min(game_lengths)
-            max_length = max(game_lengths)
+            avg_length, min_length, max_length = _summarize(game_lengths)
             
             self.log_test("游戏长度", "统计", f"平均{avg_length:.1f}回合 (范围: {min_length}-{max_length})")
         
@@ -300,6 +356,7 @@ class AIBalanceTest:
             
             self.log_test("平衡性评估", balance_level, f"平衡分数: {balance_score:.1f}/100")
     
+    @_flush_log_after
     def test_ai_adaptability(self):
         """测试AI适应性"""
         print("\n🔄 测试AI适应性...")
@@ -307,14 +364,7 @@ class AIBalanceTest:
         adaptability_scores = []
         
         # 测试不同难度场景
-        scenarios = [
-            ("简单场景", {"complexity": 1, "pressure": 1}),
-            ("中等场景", {"complexity": 5, "pressure": 3}),
-            ("困难场景", {"complexity": 8, "pressure": 7}),
-            ("极限场景", {"complexity": 10, "pressure": 10})
-        ]
-        
-        for scenario_name, params in scenarios:
+        for scenario_name, params in _ADAPTABILITY_SCENARIOS:
             try:
                 score = self._test_scenario_adaptability(scenario_name, params)
                 adaptability_scores.append(score)
@@ -351,6 +401,9 @@ class AIBalanceTest:
                 "priority": priority
             }
         
+        # 场景内的行动固定，最高优先级只需计算一次
+        max_priority = _max_priority(valid_actions)
+        
         # 测试AI在此场景下的表现
         correct_decisions = 0
         total_decisions = 10
@@ -360,20 +413,17 @@ class AIBalanceTest:
             chosen_action = valid_actions[ai_choice]
             
             # 评估决策是否合理
-            if self._is_reasonable_decision(chosen_action, valid_actions, complexity, pressure):
+            if self._is_reasonable_decision(chosen_action, max_priority, complexity, pressure):
                 correct_decisions += 1
         
         return (correct_decisions / total_decisions) * 10
     
-    def _is_reasonable_decision(self, chosen_action: Dict, all_actions: Dict, complexity: int, pressure: int) -> bool:
+    def _is_reasonable_decision(self, chosen_action: Dict, max_priority: int, complexity: int, pressure: int) -> bool:
         """判断决策是否合理"""
-        chosen_priority = chosen_action.get("priority", 5)
-        max_priority = max(action.get("priority", 5) for action in all_actions.values())
-        
         # 在高复杂度和高压力下，要求更高的决策质量
         threshold = 0.7 if complexity > 7 or pressure > 7 else 0.5
         
-        return (chosen_priority / max_priority) >= threshold if max_priority > 0 else True
+        return _meets_threshold(chosen_action.get("priority", 5), max_priority, threshold)
     
     def generate_ai_balance_report(self):
         """生成AI和平衡性测试报告"""
@@ -384,17 +434,18 @@ class AIBalanceTest:
         
         # 统计测试结果
         total_tests = len(self.test_results)
-        successful_tests = len([test for test in self.test_results if test["结果"] not in ["失败", "错误"]])
+        successful_tests = len([entry for entry in self.test_results if entry[2] not in ["失败", "错误"]])
         success_rate = (successful_tests / total_tests * 100) if total_tests > 0 else 0
         
         # 计算AI性能指标
         ai_metrics = {}
         for metric, scores in self.ai_performance.items():
             if scores:
+                avg_score, min_score, max_score = _summarize(scores)
                 ai_metrics[metric] = {
-                    "平均分": sum(scores) / len(scores),
-                    "最高分": max(scores),
-                    "最低分": min(scores),
+                    "平均分": avg_score,
+                    "最高分": max_score,
+                    "最低分": min_score,
                     "样本数": len(scores)
                 }
         
@@ -405,7 +456,10 @@ class AIBalanceTest:
             "成功测试数": successful_tests,
             "成功率": f"{success_rate:.1f}%",
             "AI性能指标": ai_metrics,
-            "详细测试日志": self.test_results,
+            "详细测试日志": [
+                dict(zip(_LOG_FIELDS, (self._format_log_time(offset_ns), test_name, result, details)))
+                for offset_ns, test_name, result, details in self.test_results
+            ],
             "综合评估": {
                 "AI智能程度": "优秀" if success_rate >= 90 else "良好" if success_rate >= 70 else "需改进",
                 "游戏平衡性": "已测试" if successful_tests >= 10 else "数据不足",
@@ -414,8 +468,7 @@ class AIBalanceTest:
         }
         
         # 保存报告
-        with open("ai_balance_test_report.json", "w", encoding="utf-8") as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
+        dump_json(report, "ai_balance_test_report.json")
         
         print(f"📋 AI和平衡性测试报告已保存: ai_balance_test_report.json")
         print(f"⭐ 总体评分: {success_rate:.1f}%")
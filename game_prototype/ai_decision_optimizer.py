@@ -3,40 +3,170 @@ AI决策优化模块
 使用生成器模式实现惰性求值，优化AI决策和可能行动的计算
 """
 
-from typing import Iterator, Dict, Any, List, Tuple, Optional
-import random
+from typing import Callable, Iterator, Dict, Any, List, Tuple, Optional
+from collections import OrderedDict
+from functools import lru_cache
+import hashlib
+import heapq
+from operator import attrgetter
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from dataclass_utils import add_slots
 from game_state import GameState, Player, Zone
 from elegant_patterns import (
     ActionType, ResourceType, PlayerState, GamePhase,
     performance_monitor, log_action, ActionResult
 )
 
+# Zobrist哈希：每个局面特征对应一个64位键，局面哈希为所含特征键的异或
+# 特征键最多缓存的条数（键由特征摘要确定，淘汰后可重新算出）
+ZOBRIST_KEY_CACHE_SIZE = 4096
+
+# 行动候选缓存的最大局面数
+MOVE_CACHE_SIZE = 256
+
+# 策略价值缓存的最大条目数
+STRATEGY_VALUE_CACHE_SIZE = 4096
+
+# 后续行动的价值衰减
+STRATEGY_DECAY_FACTOR = 0.9
+
+# 多步策略中各步行动的最低优先级（第一步/第二步/第三步）
+STRATEGY_PRIORITY_THRESHOLDS = (0.6, 0.4, 0.3)
+
+# 多步策略中各步最多展开的候选数（按优先级取前k个）
+STRATEGY_BRANCHING = (5, 3, 3)
+
+_by_priority = attrgetter("priority")
+
+# 资源按固定槽位存储：(气, 行动点, 诚意)
+COST_QI, COST_AP, COST_CY = 0, 1, 2
+COST_RESOURCES: Tuple[ResourceType, ...] = (ResourceType.QI, ResourceType.ACTION_POINTS, ResourceType.CHENG_YI)
+ResourceVector = Tuple[int, int, int]
+
+# 各类行动的资源成本
+_NO_COST: ResourceVector = (0, 0, 0)
+_COST_ONE_QI: ResourceVector = (1, 0, 0)
+_COST_ONE_AP: ResourceVector = (0, 1, 0)
+_COST_MOVE: ResourceVector = (1, 1, 0)
+_COST_DIVINE: ResourceVector = (3, 0, 0)
+
+def _card_priority(player_markers: int, max_opponent_markers: int) -> float:
+    """按区域标记数计算出牌优先级（纯数值计算）"""
+    base_priority = 0.5
+    
+    # 如果该区域没有我方标记，优先级提高
+    if player_markers == 0:
+        base_priority += 0.3
+        
+    # 如果对手在该区域有优势，优先级提高
+    if max_opponent_markers > player_markers:
+        base_priority += 0.2
+        
+    return min(1.0, base_priority)
+
+def _tian_bonus(player: Player) -> float:
+    """天域适合冥想"""
+    return 0.4 if player.qi < 5 else 0.0
+
+def _ren_bonus(player: Player) -> float:
+    """人域适合学习"""
+    return 0.3 if player.cheng_yi < 3 else 0.0
+
+def _di_bonus(player: Player) -> float:
+    """地域平衡"""
+    return 0.1
+
+# 目标区域 -> 移动优先级加成
+_MOVEMENT_BONUS: Dict[Zone, Callable[[Player], float]] = {
+    Zone.TIAN: _tian_bonus,
+    Zone.REN: _ren_bonus,
+    Zone.DI: _di_bonus,
+}
+
+@lru_cache(maxsize=ZOBRIST_KEY_CACHE_SIZE)
+def _zobrist_key(feature: Tuple) -> int:
+    """取特征对应的64位键（取特征的blake2b摘要，与进程和出现顺序无关）"""
+    digest = hashlib.blake2b(repr(feature).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+def _position_features(player: Player, game_state: GameState) -> Tuple[Tuple, ...]:
+    """列出影响行动候选生成的局面特征（玩家属性、手牌、各区域标记）"""
+    features = [
+        ("player", player.name),
+        ("qi", player.qi),
+        ("cheng_yi", player.cheng_yi),
+        ("position", player.position),
+    ]
+    for i, card in enumerate(player.hand):
+        features.append(("card", i, card.name, tuple(card.associated_guas)))
+    for zone, zone_data in game_state.board.gua_zones.items():
+        for name, count in zone_data.get("markers", {}).items():
+            features.append(("markers", zone, name, count))
+    return tuple(features)
+
+def _features_hash(features: Tuple[Tuple, ...]) -> int:
+    """各特征键的异或"""
+    h = 0
+    for feature in features:
+        h ^= _zobrist_key(feature)
+    return h
+
+@lru_cache(maxsize=ZOBRIST_KEY_CACHE_SIZE)
+def _resource_hash(resource_vector: ResourceVector) -> int:
+    """可用资源对局面哈希的贡献"""
+    h = 0
+    for slot, amount in enumerate(resource_vector):
+        h ^= _zobrist_key(("resource", slot, amount))
+    return h
+
+@add_slots
 @dataclass
 class DecisionContext:
     """决策上下文"""
     player: Player
     game_state: GameState
-    available_resources: Dict[ResourceType, int]
+    available_resources: Dict[ResourceType, int]  # 构造时复制一份（视为只读），与resource_vector、state_hash保持一致
     strategic_goals: List[str]
     risk_tolerance: float = 0.5
+    state_hash: Optional[int] = None  # 局面（含可用资源）的Zobrist哈希，未给出时自动计算
+    position_key: Optional[Tuple[Tuple, ...]] = field(default=None, repr=False)  # 局面特征，用于核对缓存命中
+    resource_vector: ResourceVector = field(init=False, repr=False)  # 按成本槽位排列的可用资源
     
-@dataclass
+    def __post_init__(self):
+        if self.position_key is None:
+            self.position_key = _position_features(self.player, self.game_state)
+        resources = self.available_resources = dict(self.available_resources)
+        self.resource_vector = tuple(resources.get(resource_type, 0) for resource_type in COST_RESOURCES)
+        if self.state_hash is None:
+            self.state_hash = _features_hash(self.position_key) ^ _resource_hash(self.resource_vector)
+    
+@add_slots
+@dataclass(frozen=True)
 class ActionCandidate:
-    """行动候选"""
+    """行动候选（不可变：同一局面的候选会被缓存复用）"""
     action_type: ActionType
     priority: float
     expected_outcome: float
-    resource_cost: Dict[ResourceType, int]
+    resource_cost: ResourceVector  # (气, 行动点, 诚意)
     description: str
     args: Dict[str, Any]
 
 class AIDecisionOptimizer:
     """AI决策优化器"""
     
+    # 所有区域，以及从每个区域出发可移动到的其他区域
+    _ALL_ZONES: Tuple[Zone, ...] = tuple(Zone)
+    _ZONES_BY_EXCLUDING: Dict[Zone, Tuple[Zone, ...]] = {
+        zone: tuple(other for other in Zone if other != zone) for zone in Zone
+    }
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        # 置换表：不含资源的局面哈希 -> (局面特征, 该局面的全部行动候选)（LRU淘汰）
+        self._move_cache: "OrderedDict[int, Tuple[Tuple, Tuple[ActionCandidate, ...]]]" = OrderedDict()
+        # 策略价值缓存（LRU淘汰）
+        self._value_cache: "OrderedDict[Tuple, float]" = OrderedDict()
         
     @performance_monitor(threshold_ms=200.0)
     def generate_strategic_moves(self, context: DecisionContext) -> Iterator[ActionCandidate]:
@@ -49,7 +179,23 @@ class AIDecisionOptimizer:
         Yields:
             行动候选
         """
-        # 惰性生成各种类型的行动
+        # 相同局面的候选只生成一次；候选不依赖可用资源，去掉哈希中的资源部分，
+        # 使资源不同的同一局面共用候选，命中时核对局面特征排除哈希碰撞
+        key = context.state_hash ^ _resource_hash(context.resource_vector)
+        entry = self._move_cache.get(key)
+        if entry is None or entry[0] != context.position_key:
+            candidates = tuple(self._generate_all_moves(context))
+            self._move_cache[key] = (context.position_key, candidates)
+            self._move_cache.move_to_end(key)
+            if len(self._move_cache) > MOVE_CACHE_SIZE:
+                self._move_cache.popitem(last=False)
+        else:
+            self._move_cache.move_to_end(key)
+            candidates = entry[1]
+        yield from candidates
+        
+    def _generate_all_moves(self, context: DecisionContext) -> Iterator[ActionCandidate]:
+        """依次生成各类行动候选"""
         yield from self._generate_resource_actions(context)
         yield from self._generate_card_actions(context)
         yield from self._generate_movement_actions(context)
@@ -65,7 +211,7 @@ class AIDecisionOptimizer:
                 action_type=ActionType.MEDITATE,
                 priority=0.8,
                 expected_outcome=0.7,
-                resource_cost={},
+                resource_cost=_NO_COST,
                 description="冥想获得气",
                 args={}
             )
@@ -76,7 +222,7 @@ class AIDecisionOptimizer:
                 action_type=ActionType.STUDY,
                 priority=0.6,
                 expected_outcome=0.6,
-                resource_cost={ResourceType.QI: 1},
+                resource_cost=_COST_ONE_QI,
                 description="学习获得诚意",
                 args={}
             )
@@ -84,18 +230,29 @@ class AIDecisionOptimizer:
     def _generate_card_actions(self, context: DecisionContext) -> Iterator[ActionCandidate]:
         """生成卡牌相关行动"""
         player = context.player
+        # 生成期间棋盘不变：一次取出手牌涉及各区域的标记快照
+        gua_zones = context.game_state.board.gua_zones
+        markers_snapshot = {
+            zone: gua_zones.get(zone, {}).get("markers", {})
+            for card in player.hand for zone in card.associated_guas
+        }
+        # 出牌优先级只取决于区域，同一区域只计算一次
+        zone_priorities: Dict[str, float] = {}
         
         # 为每张手牌生成打出行动
         for i, card in enumerate(player.hand):
             for zone in card.associated_guas:
                 # 计算在该区域打出的优先级
-                priority = self._calculate_card_play_priority(card, zone, context)
+                priority = zone_priorities.get(zone)
+                if priority is None:
+                    priority = zone_priorities[zone] = self._calculate_card_play_priority(
+                        card, zone, context, markers_snapshot[zone])
                 
                 yield ActionCandidate(
                     action_type=ActionType.PLAY_CARD,
                     priority=priority,
                     expected_outcome=priority * 0.8,
-                    resource_cost={ResourceType.QI: 1},
+                    resource_cost=_COST_ONE_QI,
                     description=f"打出 {card.name} 到 {zone}",
                     args={"card_index": i, "zone": zone}
                 )
@@ -106,18 +263,17 @@ class AIDecisionOptimizer:
         current_zone = player.position
         
         # 生成到其他区域的移动
-        for zone in Zone:
-            if zone != current_zone:
-                priority = self._calculate_movement_priority(zone, context)
-                
-                yield ActionCandidate(
-                    action_type=ActionType.MOVE,
-                    priority=priority,
-                    expected_outcome=priority * 0.5,
-                    resource_cost={ResourceType.AP: 1, ResourceType.QI: 1},
-                    description=f"移动到 {zone.value}",
-                    args={"target_zone": zone}
-                )
+        for zone in self._ZONES_BY_EXCLUDING.get(current_zone, self._ALL_ZONES):
+            priority = self._calculate_movement_priority(zone, context)
+            
+            yield ActionCandidate(
+                action_type=ActionType.MOVE,
+                priority=priority,
+                expected_outcome=priority * 0.5,
+                resource_cost=_COST_MOVE,
+                description=f"移动到 {zone.value}",
+                args={"target_zone": zone}
+            )
                 
     def _generate_special_actions(self, context: DecisionContext) -> Iterator[ActionCandidate]:
         """生成特殊行动"""
@@ -129,7 +285,7 @@ class AIDecisionOptimizer:
                 action_type=ActionType.SPECIAL,
                 priority=0.4,
                 expected_outcome=0.6,
-                resource_cost={ResourceType.AP: 1},
+                resource_cost=_COST_ONE_AP,
                 description="变卦转换",
                 args={"action": "biangua"}
             )
@@ -140,7 +296,7 @@ class AIDecisionOptimizer:
                 action_type=ActionType.SPECIAL,
                 priority=0.3,
                 expected_outcome=0.5,
-                resource_cost={ResourceType.QI: 3},
+                resource_cost=_COST_DIVINE,
                 description="占卜运势",
                 args={"action": "divine_fortune"}
             )
@@ -166,28 +322,49 @@ class AIDecisionOptimizer:
             yield from self._generate_multi_step_strategies(context, max_depth)
             
     def _generate_multi_step_strategies(self, context: DecisionContext, max_depth: int) -> Iterator[List[ActionCandidate]]:
-        """生成多步策略"""
-        # 获取高优先级的第一步行动
-        first_actions = list(self.generate_strategic_moves(context))
-        high_priority_actions = [a for a in first_actions if a.priority > 0.6]
+        """
+        生成多步策略（分支限界搜索）
         
-        for first_action in high_priority_actions[:5]:  # 限制分支数量
-            # 模拟执行第一步后的状态
-            simulated_context = self._simulate_action_result(context, first_action)
-            
-            # 生成后续行动
-            for second_action in self.generate_strategic_moves(simulated_context):
-                if second_action.priority > 0.4:  # 只考虑中等以上优先级
-                    strategy = [first_action, second_action]
+        深度优先展开，累计价值与 evaluate_strategy_sequence 一致；
+        只产出不差于当前最优值的策略，乐观上界无法超过最优值的分支直接剪掉。
+        """
+        depth_limit = min(max_depth, len(STRATEGY_PRIORITY_THRESHOLDS))
+        decay_weights = [STRATEGY_DECAY_FACTOR ** depth for depth in range(depth_limit)]
+        # 第depth步及之后剩余各步的价值上界（单步预期收益不超过1.0）
+        optimistic_rest = [sum(decay_weights[depth:]) for depth in range(depth_limit + 1)]
+        alpha = 0.0
+        
+        def top_actions(depth: int, current_context: DecisionContext) -> List[ActionCandidate]:
+            """该步可执行且优先级最高的若干候选（限制分支数量，按优先级从高到低）"""
+            threshold = STRATEGY_PRIORITY_THRESHOLDS[depth]
+            # 资源不足的行动只会让策略价值减半，不可能优于已有前缀，先行排除
+            return heapq.nlargest(
+                STRATEGY_BRANCHING[depth],
+                (a for a in self.generate_strategic_moves(current_context)
+                 if a.priority > threshold and self._can_afford_action(a, current_context)),
+                key=_by_priority,
+            )
+        
+        def expand(depth: int, actions: List[ActionCandidate], partial: List[ActionCandidate],
+                   value: float, current_context: DecisionContext) -> Iterator[List[ActionCandidate]]:
+            nonlocal alpha
+            # 高优先级行动先展开，尽早抬高最优值
+            for action in actions:
+                new_value = value + action.expected_outcome * decay_weights[depth]
+                strategy = partial + [action]
+                if depth > 0 and new_value >= alpha:
+                    alpha = new_value
                     yield strategy
                     
-                    # 如果还有深度，继续生成
-                    if max_depth > 2:
-                        third_context = self._simulate_action_result(simulated_context, second_action)
-                        for third_action in self.generate_strategic_moves(third_context):
-                            if third_action.priority > 0.3:
-                                yield [first_action, second_action, third_action]
-                                
+                # 如果还有深度且仍可能超过最优值，继续展开
+                next_depth = depth + 1
+                if next_depth < depth_limit and new_value + optimistic_rest[next_depth] > alpha:
+                    next_context = self._simulate_action_result(current_context, action)
+                    yield from expand(next_depth, top_actions(next_depth, next_context),
+                                      strategy, new_value, next_context)
+        
+        yield from expand(0, top_actions(0, context), [], 0.0, context)
+        
     @performance_monitor(threshold_ms=50.0)
     def evaluate_strategy_sequence(self, strategy: List[ActionCandidate], context: DecisionContext) -> float:
         """
@@ -203,67 +380,71 @@ class AIDecisionOptimizer:
         if not strategy:
             return 0.0
             
+        # 策略价值只取决于各行动的类型、预期收益、成本以及初始可用资源
+        key = (
+            frozenset(context.available_resources.items()),
+            tuple((a.action_type, a.expected_outcome, a.resource_cost) for a in strategy),
+        )
+        value = self._value_cache.get(key)
+        if value is None:
+            value = self._score_strategy(strategy, context)
+            self._value_cache[key] = value
+            if len(self._value_cache) > STRATEGY_VALUE_CACHE_SIZE:
+                self._value_cache.popitem(last=False)
+        else:
+            self._value_cache.move_to_end(key)
+        return value
+        
+    def _score_strategy(self, strategy: List[ActionCandidate], context: DecisionContext) -> float:
+        """逐步模拟并累计策略价值"""
         total_value = 0.0
         current_context = context
-        decay_factor = 0.9  # 后续行动的价值衰减
+        decay_factor = STRATEGY_DECAY_FACTOR
+        weight = 1.0  # 当前行动的衰减权重，逐步累乘
         
-        for i, action in enumerate(strategy):
+        for action in strategy:
             # 检查资源是否足够
             if not self._can_afford_action(action, current_context):
                 return total_value * 0.5  # 无法执行的策略价值减半
                 
             # 计算行动价值
-            action_value = action.expected_outcome * (decay_factor ** i)
-            total_value += action_value
+            total_value += action.expected_outcome * weight
+            weight *= decay_factor
             
             # 更新上下文（简化模拟）
             current_context = self._simulate_action_result(current_context, action)
             
         return total_value
         
-    def _calculate_card_play_priority(self, card, zone: str, context: DecisionContext) -> float:
-        """计算卡牌打出的优先级"""
-        base_priority = 0.5
-        
+    def _calculate_card_play_priority(self, card, zone: str, context: DecisionContext,
+                                      markers: Optional[Dict[str, int]] = None) -> float:
+        """计算卡牌打出的优先级（markers 为调用方已取出的该区域标记）"""
         # 根据区域控制情况调整优先级
-        zone_data = context.game_state.board.gua_zones.get(zone, {})
-        markers = zone_data.get("markers", {})
+        if markers is None:
+            zone_data = context.game_state.board.gua_zones.get(zone, {})
+            markers = zone_data.get("markers", {})
         
-        # 如果该区域没有我方标记，优先级提高
-        player_markers = markers.get(context.player.name, 0)
-        if player_markers == 0:
-            base_priority += 0.3
-            
-        # 如果对手在该区域有优势，优先级提高
-        max_opponent_markers = max([markers.get(name, 0) for name in markers if name != context.player.name] + [0])
-        if max_opponent_markers > player_markers:
-            base_priority += 0.2
-            
-        return min(1.0, base_priority)
+        player_name = context.player.name
+        player_markers = markers.get(player_name, 0)
+        max_opponent_markers = max((count for name, count in markers.items() if name != player_name), default=0)
+        return _card_priority(player_markers, max_opponent_markers)
         
     def _calculate_movement_priority(self, target_zone: Zone, context: DecisionContext) -> float:
         """计算移动的优先级"""
         base_priority = 0.3
         
         # 根据目标区域的特性调整优先级
-        if target_zone == Zone.TIAN:  # 天域适合冥想
-            if context.player.qi < 5:
-                base_priority += 0.4
-        elif target_zone == Zone.REN:  # 人域适合学习
-            if context.player.cheng_yi < 3:
-                base_priority += 0.3
-        elif target_zone == Zone.DI:  # 地域平衡
-            base_priority += 0.1
+        zone_bonus = _MOVEMENT_BONUS.get(target_zone)
+        if zone_bonus is not None:
+            base_priority += zone_bonus(context.player)
             
         return min(1.0, base_priority)
         
     def _can_afford_action(self, action: ActionCandidate, context: DecisionContext) -> bool:
         """检查是否有足够资源执行行动"""
-        for resource_type, cost in action.resource_cost.items():
-            available = context.available_resources.get(resource_type, 0)
-            if available < cost:
-                return False
-        return True
+        qi, ap, cheng_yi = context.resource_vector
+        cost_qi, cost_ap, cost_cy = action.resource_cost
+        return qi >= cost_qi and ap >= cost_ap and cheng_yi >= cost_cy
         
     def _simulate_action_result(self, context: DecisionContext, action: ActionCandidate) -> DecisionContext:
         """模拟行动结果，返回新的上下文"""
@@ -271,8 +452,9 @@ class AIDecisionOptimizer:
         new_resources = context.available_resources.copy()
         
         # 扣除资源成本
-        for resource_type, cost in action.resource_cost.items():
-            new_resources[resource_type] = max(0, new_resources.get(resource_type, 0) - cost)
+        for resource_type, available, cost in zip(COST_RESOURCES, context.resource_vector, action.resource_cost):
+            if cost:
+                new_resources[resource_type] = max(0, available - cost)
             
         # 根据行动类型添加收益
         if action.action_type == ActionType.MEDITATE:
@@ -281,12 +463,16 @@ class AIDecisionOptimizer:
             # 学习增加诚意（这里简化处理）
             pass
             
+        # 模拟只改变可用资源，玩家与棋盘不变：沿用局面特征，哈希增量更新（异或移出旧资源、移入新资源）
+        new_vector = tuple(new_resources.get(resource_type, 0) for resource_type in COST_RESOURCES)
         return DecisionContext(
             player=context.player,
             game_state=context.game_state,
             available_resources=new_resources,
             strategic_goals=context.strategic_goals,
-            risk_tolerance=context.risk_tolerance
+            risk_tolerance=context.risk_tolerance,
+            state_hash=context.state_hash ^ _resource_hash(context.resource_vector) ^ _resource_hash(new_vector),
+            position_key=context.position_key
         )
 
 # 导出接口
@@ -0,0 +1,40 @@
+"""
+dataclass工具模块
+为Python 3.9提供带__slots__的dataclass（等价于3.10的dataclass(slots=True)）
+"""
+
+from dataclasses import fields
+
+def _dataclass_getstate(self):
+    """按字段顺序导出状态"""
+    return [getattr(self, f.name) for f in fields(self)]
+
+def _dataclass_setstate(self, state):
+    """恢复状态（冻结的dataclass不能经__setattr__赋值）"""
+    for f, value in zip(fields(self), state):
+        object.__setattr__(self, f.name, value)
+
+def add_slots(cls):
+    """
+    为dataclass重建带__slots__的类
+
+    冻结的类额外定义__getstate__/__setstate__，使copy、deepcopy与pickle仍可用
+
+    用法：
+        @add_slots
+        @dataclass(frozen=True)
+        class Point:
+            x: int
+            y: int
+    """
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict = dict(cls.__dict__)
+    cls_dict["__slots__"] = field_names
+    for name in field_names:
+        cls_dict.pop(name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    if cls.__dataclass_params__.frozen:
+        cls_dict.setdefault("__getstate__", _dataclass_getstate)
+        cls_dict.setdefault("__setstate__", _dataclass_setstate)
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
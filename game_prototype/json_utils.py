@@ -0,0 +1,57 @@
+"""
+JSON编解码工具模块
+依次优先使用orjson、ujson，都不可用时回退到标准库json
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import ujson
+    UJSON_AVAILABLE = True
+except ImportError:
+    UJSON_AVAILABLE = False
+
+def _json_default(obj: Any) -> str:
+    """标准库json的回退序列化：datetime输出为ISO-8601字符串（与orjson一致）"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def encode_json(data: Any) -> bytes:
+    """编码为UTF-8 JSON字节串（缩进2格；datetime原样传入即可）"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    if UJSON_AVAILABLE:
+        return ujson.dumps(data, ensure_ascii=False, indent=2, escape_forward_slashes=False,
+                           default=_json_default).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, indent=2, default=_json_default).encode("utf-8")
+
+def decode_json(payload: bytes) -> Any:
+    """解码JSON字节串"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(payload)
+    if UJSON_AVAILABLE:
+        return ujson.loads(payload)
+    return json.loads(payload)
+
+def encode_json_line(data: Any) -> bytes:
+    """编码为单行JSON（JSONL记录，末尾带换行）"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE)
+    if UJSON_AVAILABLE:
+        return ujson.dumps(data, ensure_ascii=False, escape_forward_slashes=False,
+                           default=_json_default).encode("utf-8") + b"\n"
+    return json.dumps(data, ensure_ascii=False, default=_json_default).encode("utf-8") + b"\n"
+
+def dump_json(data: Any, path: str):
+    """写入JSON文件（先整体编码再一次写入）"""
+    Path(path).write_bytes(encode_json(data))
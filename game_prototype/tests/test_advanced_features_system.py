@@ -0,0 +1,90 @@
+"""
+高级功能系统单元测试
+测试统计数据的后台写入与排行榜
+"""
+
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# 现在可以正常导入
+from advanced_features_system import StatisticsManager
+
+class TestStatisticsManager(unittest.TestCase):
+    """测试统计数据管理器"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.stats_file = os.path.join(self.temp_dir.name, "player_statistics.db")
+        self.manager = StatisticsManager(self.stats_file)
+        self.closed = False
+
+    def tearDown(self):
+        """清理测试环境"""
+        if not self.closed:
+            self.manager.close()
+        self.temp_dir.cleanup()
+
+    def record_games(self):
+        """记录几局对局：甲两胜一负，乙一胜，丙一负"""
+        self.manager.update_game_result("甲", won=True, playtime=60.0)
+        self.manager.update_game_result("甲", won=False, playtime=30.0)
+        self.manager.update_game_result("甲", won=True, playtime=45.0)
+        self.manager.update_game_result("乙", won=True, playtime=20.0)
+        self.manager.update_game_result("丙", won=False, playtime=10.0)
+
+    def test_leaderboard_before_close(self):
+        """测试未关闭时排行榜已包含全部对局结果"""
+        self.record_games()
+
+        self.assertEqual(self.manager.get_leaderboard("experience"),
+                         [("甲", 225), ("乙", 100), ("丙", 25)])
+        self.assertEqual(self.manager.get_leaderboard("playtime"),
+                         [("甲", 135.0), ("乙", 20.0), ("丙", 10.0)])
+        self.assertEqual(self.manager.get_leaderboard("win_streak"),
+                         [("甲", 1), ("乙", 1), ("丙", 0)])
+        win_rates = dict(self.manager.get_leaderboard("win_rate"))
+        self.assertEqual(win_rates["乙"], 1.0)
+        self.assertAlmostEqual(win_rates["甲"], 2 / 3)
+        self.assertEqual(win_rates["丙"], 0.0)
+
+    def test_results_committed_before_close(self):
+        """测试flush后其他连接可读到已写入的对局数"""
+        self.record_games()
+        self.manager.flush()
+
+        conn = sqlite3.connect(self.stats_file)
+        try:
+            rows = conn.execute(
+                "SELECT player_name, games_played, games_won, games_lost FROM players "
+                "ORDER BY player_name").fetchall()
+        finally:
+            conn.close()
+        self.assertEqual(sorted(rows), sorted([("甲", 3, 2, 1), ("乙", 1, 1, 0), ("丙", 1, 0, 1)]))
+
+    def test_close_stops_writer(self):
+        """测试关闭后写入线程退出，结果仍可由新管理器读出"""
+        self.record_games()
+        writer = self.manager._writer
+        self.assertTrue(writer.is_alive())
+
+        self.manager.close()
+        self.closed = True
+
+        self.assertFalse(writer.is_alive())
+        reopened = StatisticsManager(self.stats_file)
+        try:
+            self.assertEqual(reopened.get_player_stats("甲").games_played, 3)
+        finally:
+            reopened.close()
+
+if __name__ == '__main__':
+    unittest.main()
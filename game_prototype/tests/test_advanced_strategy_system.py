@@ -0,0 +1,90 @@
+"""
+高级策略系统单元测试
+测试可用策略随区域控制变化而更新，以及策略行动表的隔离与序列化
+"""
+
+import unittest
+import sys
+import copy
+import pickle
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# 现在可以正常导入
+from advanced_strategy_system import AdvancedStrategySystem
+
+class StubGameState:
+    """只含回合与棋盘的游戏状态"""
+
+    def __init__(self, gua_zones):
+        self.turn = 1
+        self.board = SimpleNamespace(gua_zones=gua_zones)
+
+# 需要“拥有至少一个卦象”的策略
+ZONE_STRATEGIES = {"一爻变", "二爻变", "互卦显现", "错卦和谐"}
+
+class TestAvailableStrategies(unittest.TestCase):
+    """测试可用策略查询"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.system = AdvancedStrategySystem(seed=1)
+        self.player = SimpleNamespace(name="甲", qi=10, dao_xing=6, cheng_yi=5, yin_yang_balance=0.5)
+        self.game_state = StubGameState({
+            "乾": {"markers": {}, "controller": None},
+            "坤": {"markers": {}, "controller": None},
+        })
+
+    def available_names(self):
+        """当前可用策略的名称"""
+        return {action.name for action in self.system.get_available_strategies(self.player, self.game_state)}
+
+    def test_control_change_within_turn(self):
+        """测试同一回合内区域易手后策略列表随之更新"""
+        self.assertFalse(self.available_names() & ZONE_STRATEGIES)
+
+        # 回合内取得区域控制（与check_zone_control相同，就地修改controller）
+        self.game_state.board.gua_zones["乾"]["controller"] = "甲"
+        self.assertTrue(ZONE_STRATEGIES <= self.available_names())
+
+        # 回合内失去控制
+        self.game_state.board.gua_zones["乾"]["controller"] = "乙"
+        self.assertFalse(self.available_names() & ZONE_STRATEGIES)
+
+class TestStrategyActions(unittest.TestCase):
+    """测试策略行动表"""
+
+    def test_tables_are_per_instance(self):
+        """测试修改一个系统的行动表不影响其他系统"""
+        first = AdvancedStrategySystem(seed=1)
+        second = AdvancedStrategySystem(seed=2)
+
+        del first.strategy_actions["single_line_change"]
+
+        self.assertIn("single_line_change", second.strategy_actions)
+        self.assertIn("single_line_change", AdvancedStrategySystem(seed=3).strategy_actions)
+
+    def test_effects_are_immutable(self):
+        """测试效果以（名称, 数值）对的元组保存"""
+        action = AdvancedStrategySystem(seed=1).strategy_actions["single_line_change"]
+
+        self.assertIsInstance(action.effects, tuple)
+        self.assertEqual(dict(action.effects), {"transform_hexagram": True, "power_bonus": 1.2})
+
+    def test_action_copy_and_pickle(self):
+        """测试策略行动与行动表可复制、可序列化"""
+        actions = AdvancedStrategySystem(seed=1).strategy_actions
+        action = actions["single_line_change"]
+
+        for restored in (copy.copy(action), copy.deepcopy(action), pickle.loads(pickle.dumps(action))):
+            self.assertEqual(restored, action)
+            self.assertEqual(restored.effects, action.effects)
+            self.assertEqual(restored.condition_checks, action.condition_checks)
+        self.assertEqual(pickle.loads(pickle.dumps(actions)), actions)
+
+if __name__ == '__main__':
+    unittest.main()
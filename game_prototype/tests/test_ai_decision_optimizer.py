@@ -0,0 +1,268 @@
+"""
+AI决策优化模块单元测试
+测试决策上下文与行动候选的复制/序列化、行动候选缓存与多步策略剪枝
+"""
+
+import unittest
+import sys
+import copy
+import heapq
+import pickle
+from dataclasses import FrozenInstanceError
+from operator import attrgetter
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# 现在可以正常导入
+from ai_decision_optimizer import (
+    AIDecisionOptimizer, ActionCandidate, DecisionContext,
+    STRATEGY_BRANCHING, STRATEGY_PRIORITY_THRESHOLDS
+)
+from elegant_patterns import ActionType, ResourceType
+from game_state import Zone
+
+class StubCard:
+    """只含名称与关联卦象的卡牌"""
+
+    def __init__(self, name, associated_guas):
+        self.name = name
+        self.associated_guas = list(associated_guas)
+
+class StubPlayer:
+    """只含决策所需属性的玩家"""
+
+    def __init__(self, name="甲", qi=3, cheng_yi=2, position="地", hand=()):
+        self.name = name
+        self.qi = qi
+        self.cheng_yi = cheng_yi
+        self.position = position
+        self.hand = list(hand)
+
+class StubGameState:
+    """只含棋盘区域的游戏状态"""
+
+    def __init__(self, gua_zones):
+        self.board = SimpleNamespace(gua_zones=gua_zones)
+
+def make_context(player=None, game_state=None, qi=3, ap=2, cheng_yi=2):
+    """构造决策上下文"""
+    return DecisionContext(
+        player=player or StubPlayer(),
+        game_state=game_state or StubGameState({"乾": {"markers": {"甲": 1, "乙": 2}}}),
+        available_resources={ResourceType.QI: qi, ResourceType.ACTION_POINTS: ap,
+                             ResourceType.CHENG_YI: cheng_yi},
+        strategic_goals=["控制区域"]
+    )
+
+def make_board():
+    """构造固定的棋盘：乾被对手占优，坤有我方标记，震无人"""
+    return StubGameState({
+        "乾": {"markers": {"乙": 2}},
+        "坤": {"markers": {"甲": 1}},
+        "震": {"markers": {}},
+    })
+
+def make_player(hand=None):
+    """构造位于地域、持有固定手牌的玩家"""
+    if hand is None:
+        hand = [StubCard("乾坤牌", ["乾", "坤"]), StubCard("震牌", ["震"])]
+    return StubPlayer(position=Zone.DI, hand=hand)
+
+def exhaustive_strategies(optimizer, context, max_depth):
+    """不剪枝的基准：按与搜索相同的候选规则展开全部多步策略"""
+    depth_limit = min(max_depth, len(STRATEGY_PRIORITY_THRESHOLDS))
+
+    def expand(depth, partial, current_context):
+        if depth == depth_limit:
+            return
+        actions = heapq.nlargest(
+            STRATEGY_BRANCHING[depth],
+            (a for a in optimizer.generate_strategic_moves(current_context)
+             if a.priority > STRATEGY_PRIORITY_THRESHOLDS[depth]
+             and optimizer._can_afford_action(a, current_context)),
+            key=attrgetter("priority"),
+        )
+        for action in actions:
+            strategy = partial + [action]
+            if depth > 0:
+                yield strategy
+            yield from expand(depth + 1, strategy,
+                              optimizer._simulate_action_result(current_context, action))
+
+    return list(expand(0, [], context))
+
+class TestDecisionContext(unittest.TestCase):
+    """测试决策上下文"""
+
+    def assertSameContext(self, restored, context):
+        """上下文的资源、资源向量与局面哈希一致"""
+        self.assertEqual(restored.available_resources, context.available_resources)
+        self.assertEqual(restored.resource_vector, context.resource_vector)
+        self.assertEqual(restored.state_hash, context.state_hash)
+        self.assertEqual(restored.position_key, context.position_key)
+
+    def test_resources_are_copied(self):
+        """测试构造后修改传入的资源字典不影响上下文"""
+        resources = {ResourceType.QI: 3}
+        context = DecisionContext(player=StubPlayer(), game_state=StubGameState({}),
+                                  available_resources=resources, strategic_goals=[])
+        resources[ResourceType.QI] = 0
+
+        self.assertEqual(context.available_resources[ResourceType.QI], 3)
+        self.assertEqual(context.resource_vector, (3, 0, 0))
+
+    def test_context_copy(self):
+        """测试浅复制与深复制"""
+        context = make_context()
+
+        self.assertSameContext(copy.copy(context), context)
+        self.assertSameContext(copy.deepcopy(context), context)
+
+    def test_context_pickle(self):
+        """测试序列化往返"""
+        context = make_context()
+
+        self.assertSameContext(pickle.loads(pickle.dumps(context)), context)
+
+class TestActionCandidate(unittest.TestCase):
+    """测试行动候选"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.candidate = ActionCandidate(
+            action_type=ActionType.MEDITATE,
+            priority=0.5,
+            expected_outcome=0.6,
+            resource_cost=(0, 1, 0),
+            description="冥想恢复",
+            args={"target": "乾"}
+        )
+
+    def test_candidate_is_frozen(self):
+        """测试候选不可修改"""
+        with self.assertRaises(FrozenInstanceError):
+            self.candidate.priority = 1.0
+        self.assertFalse(hasattr(self.candidate, "__dict__"))
+
+    def test_candidate_copy(self):
+        """测试浅复制与深复制"""
+        shallow = copy.copy(self.candidate)
+        deep = copy.deepcopy(self.candidate)
+
+        self.assertEqual(shallow, self.candidate)
+        self.assertEqual(deep, self.candidate)
+        self.assertIs(shallow.args, self.candidate.args)
+        self.assertIsNot(deep.args, self.candidate.args)
+
+    def test_candidate_pickle(self):
+        """测试序列化往返"""
+        restored = pickle.loads(pickle.dumps(self.candidate))
+
+        self.assertEqual(restored, self.candidate)
+        with self.assertRaises(FrozenInstanceError):
+            restored.priority = 1.0
+
+class TestMoveCache(unittest.TestCase):
+    """测试行动候选缓存"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.optimizer = AIDecisionOptimizer()
+        self.player = make_player()
+        self.game_state = make_board()
+
+    def moves(self, context):
+        """取出上下文的全部行动候选"""
+        return list(self.optimizer.generate_strategic_moves(context))
+
+    def test_same_position_hits_cache(self):
+        """测试同一局面（可用资源不同）直接返回缓存的候选"""
+        first = self.moves(make_context(self.player, self.game_state, qi=3, ap=2))
+
+        with patch.object(self.optimizer, "_generate_all_moves") as generate:
+            second = self.moves(make_context(self.player, self.game_state, qi=5, ap=1))
+
+        generate.assert_not_called()
+        self.assertEqual(len(second), len(first))
+        for cached, original in zip(second, first):
+            self.assertIs(cached, original)
+
+    def test_different_position_misses_cache(self):
+        """测试棋盘变化后重新生成候选"""
+        first = self.moves(make_context(self.player, self.game_state))
+
+        # 我方在乾落下标记，乾的出牌优先级随之下降
+        self.game_state.board.gua_zones["乾"]["markers"]["甲"] = 1
+        with patch.object(self.optimizer, "_generate_all_moves",
+                          wraps=self.optimizer._generate_all_moves) as generate:
+            second = self.moves(make_context(self.player, self.game_state))
+
+        generate.assert_called_once()
+        self.assertNotEqual([a.priority for a in second], [a.priority for a in first])
+
+    def test_hash_collision_misses_cache(self):
+        """测试局面哈希相同但局面不同时不返回其他局面的候选"""
+        first_context = make_context(self.player, self.game_state)
+        first = self.moves(first_context)
+
+        other_player = make_player(hand=[])
+        colliding = DecisionContext(
+            player=other_player,
+            game_state=self.game_state,
+            available_resources=dict(first_context.available_resources),
+            strategic_goals=[],
+            state_hash=first_context.state_hash
+        )
+        second = self.moves(colliding)
+
+        self.assertEqual(len(first) - len(second), 3)
+        self.assertFalse(any(a.action_type == ActionType.PLAY_CARD for a in second))
+
+class TestMultiStepStrategies(unittest.TestCase):
+    """测试多步策略的分支限界搜索"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.optimizer = AIDecisionOptimizer()
+
+    def assertSameBest(self, context, max_depth):
+        """剪枝搜索找到的最优策略与不剪枝的基准一致"""
+        def value(strategy):
+            return self.optimizer.evaluate_strategy_sequence(strategy, context)
+
+        pruned = list(self.optimizer._generate_multi_step_strategies(context, max_depth))
+        baseline = exhaustive_strategies(self.optimizer, context, max_depth)
+
+        self.assertTrue(pruned)
+        self.assertLess(len(pruned), len(baseline))
+        # 剪枝搜索只产出逐步抬高最优值的策略，每条都应出现在基准中
+        for strategy in pruned:
+            self.assertIn(strategy, baseline)
+        best_pruned = max(pruned, key=value)
+        best_baseline = max(baseline, key=value)
+        self.assertAlmostEqual(value(best_pruned), value(best_baseline))
+        self.assertEqual(best_pruned, best_baseline)
+
+    def test_pruned_search_matches_baseline(self):
+        """测试三步搜索"""
+        self.assertSameBest(make_context(make_player(), make_board(), qi=3, ap=2), 3)
+
+    def test_pruned_search_matches_baseline_two_steps(self):
+        """测试两步搜索"""
+        self.assertSameBest(make_context(make_player(), make_board(), qi=3, ap=2), 2)
+
+    def test_pruned_search_matches_baseline_with_scarce_resources(self):
+        """测试资源紧张的局面（最优策略不在最先展开的分支上）"""
+        self.assertSameBest(make_context(make_player(), make_board(), qi=0, ap=1, cheng_yi=0), 3)
+
+    def test_pruned_search_matches_baseline_without_cards(self):
+        """测试无手牌的局面"""
+        self.assertSameBest(make_context(make_player(hand=[]), make_board(), qi=0, ap=1, cheng_yi=0), 3)
+
+if __name__ == '__main__':
+    unittest.main()